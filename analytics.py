@@ -31,6 +31,52 @@ class ContributionAnalytics:
         # Create an index for faster querying by timestamp
         self.cursor.execute('''CREATE INDEX IF NOT EXISTS timestamp_idx 
                             ON contributions(timestamp)''')
+        
+        # Daily commit totals, maintained by triggers so charts read one row per day.
+        # Checked, created and backfilled in one write transaction, so processes
+        # starting together cannot both backfill.
+        self.cursor.execute("BEGIN IMMEDIATE")
+        try:
+            self.cursor.execute("""SELECT 1 FROM sqlite_master 
+                                WHERE type='table' AND name='contributions_daily'""")
+            rollup_exists = self.cursor.fetchone() is not None
+            self.cursor.execute('''CREATE TABLE IF NOT EXISTS contributions_daily
+                                 (day TEXT PRIMARY KEY, commits INTEGER NOT NULL) WITHOUT ROWID''')
+            if not rollup_exists:
+                # Backfill from the existing history
+                self.cursor.execute('''INSERT INTO contributions_daily 
+                                    SELECT DATE(timestamp), COALESCE(SUM(commit_count), 0) 
+                                    FROM contributions WHERE DATE(timestamp) IS NOT NULL 
+                                    GROUP BY DATE(timestamp)''')
+            self.cursor.execute('''CREATE TRIGGER IF NOT EXISTS contributions_daily_insert 
+                                AFTER INSERT ON contributions 
+                                WHEN DATE(NEW.timestamp) IS NOT NULL 
+                                BEGIN
+                                    INSERT INTO contributions_daily (day, commits) 
+                                    VALUES (DATE(NEW.timestamp), COALESCE(NEW.commit_count, 0)) 
+                                    ON CONFLICT(day) DO UPDATE SET commits = commits + excluded.commits;
+                                END''')
+            self.cursor.execute('''CREATE TRIGGER IF NOT EXISTS contributions_daily_delete 
+                                AFTER DELETE ON contributions 
+                                BEGIN
+                                    UPDATE contributions_daily 
+                                    SET commits = commits - COALESCE(OLD.commit_count, 0) 
+                                    WHERE day = DATE(OLD.timestamp);
+                                END''')
+            self.cursor.execute('''CREATE TRIGGER IF NOT EXISTS contributions_daily_update 
+                                AFTER UPDATE OF timestamp, commit_count ON contributions 
+                                BEGIN
+                                    UPDATE contributions_daily 
+                                    SET commits = commits - COALESCE(OLD.commit_count, 0) 
+                                    WHERE day = DATE(OLD.timestamp);
+                                    INSERT INTO contributions_daily (day, commits) 
+                                    SELECT DATE(NEW.timestamp), COALESCE(NEW.commit_count, 0) 
+                                    WHERE DATE(NEW.timestamp) IS NOT NULL 
+                                    ON CONFLICT(day) DO UPDATE SET commits = commits + excluded.commits;
+                                END''')
+        except Exception:
+            self.conn.rollback()
+            raise
         self.conn.commit()
 
     def _setup_visualization(self):
@@ -477,7 +477,9 @@ def main():
         elif args.mode == 'web':
             logger.info("Starting web interface...")
             # Ensure WebInterface also uses the ConfigManager instance or path
-            web_interface = setup_web_interface(config_manager=hack.config_manager) 
+            web_interface = setup_web_interface(
+                config_manager=hack.config_manager,
+                server=hack.config_manager.get('ui.web_interface.server', 'waitress'))
             web_interface.start(debug=args.debug)
             
     except Exception as e:
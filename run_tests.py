@@ -52,16 +52,18 @@ def run_tests_with_coverage(
     # For proper coverage collection, use pytest for test running
     import pytest
     
-    # Build pytest arguments
-    pytest_args = ['-v', test_dir]
+    # Build pytest arguments, reporting the slowest tests
+    pytest_args = ['-v', '--durations=20', test_dir]
     
     # If parallel is enabled, add xdist arguments for parallelization
     if parallel and sys.platform != 'win32':  # Parallel execution not well supported on Windows
         try:
-            import pytest_xdist
+            import xdist  # Provided by the pytest-xdist package
             cpu_count = multiprocessing.cpu_count()
             worker_count = max(2, cpu_count - 1)  # Leave one CPU free
-            pytest_args.extend(['-xvs', f'-n={worker_count}'])
+            # Keep each test class/module on one worker so class-scoped patches
+            # and module fixtures are set up once, while classes run concurrently
+            pytest_args.extend(['-xvs', f'-n={worker_count}', '--dist=loadscope'])
             print(f"Running tests in parallel using {worker_count} workers...\n")
         except ImportError:
             print("pytest-xdist not installed, running tests sequentially")
@@ -11,6 +11,19 @@ import sys
 # Add parent directory to path so we can import modules
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
+# Retry sleeps are stubbed out, so anything slower than this is a hang
+RETRY_TEST_TIMEOUT = 5
+
+
+def pytest_collection_modifyitems(config, items):
+    """Attach timeouts to the retry tests when pytest-timeout is available"""
+    if not config.pluginmanager.hasplugin('timeout'):
+        return
+
+    for item in items:
+        if item.path.name == 'test_retry.py':
+            item.add_marker(pytest.mark.timeout(RETRY_TEST_TIMEOUT))
+
 
 @pytest.fixture
 def temp_config_file():
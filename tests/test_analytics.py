@@ -0,0 +1,111 @@
+import unittest
+import os
+import shutil
+import tempfile
+import threading
+import time
+import logging
+
+from analytics import ContributionAnalytics
+
+# Suppress logging during tests unless specifically testing logging
+logging.disable(logging.CRITICAL)
+
+
+class TestDailyRollup(unittest.TestCase):
+
+    def setUp(self):
+        # ContributionAnalytics opens contributions.db in the working directory
+        self.original_cwd = os.getcwd()
+        self.temp_dir = tempfile.mkdtemp()
+        os.chdir(self.temp_dir)
+        self.analytics = ContributionAnalytics()
+        self.conn = self.analytics.conn
+
+    def tearDown(self):
+        self.conn.close()
+        os.chdir(self.original_cwd)
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+        logging.disable(logging.NOTSET) # Re-enable logging
+
+    def _insert(self, timestamp, commit_count, repo='test/repo1'):
+        with self.conn:
+            self.conn.execute('INSERT INTO contributions VALUES (?, ?, ?, 10, "py")',
+                              (timestamp, repo, commit_count))
+
+    def assertRollupMatchesContributions(self):
+        rollup = dict(self.conn.execute(
+            'SELECT day, commits FROM contributions_daily WHERE commits != 0'))
+        expected = dict(self.conn.execute(
+            'SELECT DATE(timestamp), SUM(commit_count) FROM contributions GROUP BY 1'))
+        self.assertEqual(rollup, expected)
+
+    def test_rollup_follows_inserts_updates_and_deletes(self):
+        """The per-day rollup matches a GROUP BY of the raw rows after every kind of write."""
+        self._insert('2024-03-01T09:00:00', 2)
+        self._insert('2024-03-01T17:30:00', 3)
+        self._insert('2024-03-02T08:00:00', 1)
+        self.assertRollupMatchesContributions()
+
+        # Move a row to a day that already has contributions
+        with self.conn:
+            self.conn.execute("UPDATE contributions SET timestamp = '2024-03-02T12:00:00' "
+                              "WHERE timestamp = '2024-03-01T17:30:00'")
+        self.assertRollupMatchesContributions()
+
+        # Move a row to a new day, and change a commit count in place
+        with self.conn:
+            self.conn.execute("UPDATE contributions SET timestamp = '2024-03-05T10:00:00' "
+                              "WHERE timestamp = '2024-03-01T09:00:00'")
+            self.conn.execute("UPDATE contributions SET commit_count = 6 "
+                              "WHERE timestamp = '2024-03-02T08:00:00'")
+        self.assertRollupMatchesContributions()
+
+        with self.conn:
+            self.conn.execute("DELETE FROM contributions WHERE timestamp = '2024-03-05T10:00:00'")
+        self.assertRollupMatchesContributions()
+
+    def test_rollup_is_backfilled_for_existing_history(self):
+        """A database created before the rollup gets it filled from its history."""
+        self._insert('2024-03-01T09:00:00', 2)
+        self._insert('2024-03-03T09:00:00', 4)
+        with self.conn:
+            self.conn.execute('DROP TABLE contributions_daily')
+        self.conn.close()
+
+        self.analytics = ContributionAnalytics()
+        self.conn = self.analytics.conn
+        self.assertRollupMatchesContributions()
+
+    def test_start_waits_for_a_concurrent_backfill(self):
+        """An instance starting while another process backfills the rollup does not backfill it again."""
+        self._insert('2024-03-01T09:00:00', 2)
+        self._insert('2024-03-03T09:00:00', 4)
+        with self.conn:
+            self.conn.execute('DROP TABLE contributions_daily')
+
+        # Stand in for another process midway through its own start
+        self.conn.execute('BEGIN IMMEDIATE')
+        errors = []
+
+        def start():
+            try:
+                ContributionAnalytics().conn.close()
+            except Exception as e:
+                errors.append(e)
+
+        thread = threading.Thread(target=start)
+        thread.start()
+        time.sleep(0.2)
+        self.conn.execute('CREATE TABLE contributions_daily '
+                          '(day TEXT PRIMARY KEY, commits INTEGER NOT NULL) WITHOUT ROWID')
+        self.conn.execute('INSERT INTO contributions_daily '
+                          'SELECT DATE(timestamp), SUM(commit_count) FROM contributions GROUP BY 1')
+        self.conn.commit()
+        thread.join()
+
+        self.assertEqual(errors, [])
+        self.assertRollupMatchesContributions()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -3,49 +3,128 @@ Unit tests for MCP integration functionality
 """
 import os
 import unittest
-from unittest.mock import patch, MagicMock, Mock
-import json
-import tempfile
+import pytest
+from types import MappingProxyType
+from unittest.mock import patch, Mock
 from datetime import datetime
 
 # Import the modules to test
+import mcp_integration
 from mcp_integration import MCPClient, get_mcp_client
-# Attempt to import ConfigManager, or use a mock if not found (e.g. in minimal test environments)
-try:
-    from config_loader import ConfigManager
-except ImportError:
-    ConfigManager = MagicMock()
+
+# Expected request arguments for the env-only client, built once at import time
+_EXPECTED_HEADERS = MappingProxyType({
+    "Authorization": "Bearer test_api_key_env",
+    "Content-Type": "application/json"
+})
+_EXPECTED_BODY = MappingProxyType({"param": "value"})
+
+# Fixed clock for fallback content generated inside TestMCPClient
+_FROZEN_NOW = datetime(2024, 1, 1)
+
+# ConfigManager values used by the config-driven initialization tests
+_CFG_FULL = {
+    'mcp_integration.api_key': "config_api_key",
+    'mcp_integration.api_endpoint': "https://config-api.mcp.dev/v1",
+    'mcp_integration.max_retries': 10,
+    'mcp_integration.request_timeout': 30
+}
+_CFG_PARTIAL = {
+    'mcp_integration.api_key': "config_api_key", # Only API key from config
+}
+_CFG_PRIORITY = {
+    'mcp_integration.api_key': "config_api_key",
+    'mcp_integration.api_endpoint': "https://config-api.mcp.dev/v1",
+    'mcp_integration.max_retries': 10,
+}
+_CFG_GETTER_FULL = {
+    'mcp_integration.api_key': "config_api_key_getter",
+    'mcp_integration.api_endpoint': "https://config-api.mcp.dev/v1/getter",
+    'mcp_integration.max_retries': 12,
+    'mcp_integration.request_timeout': 32
+}
+_CFG_GETTER_PARTIAL = {
+    'mcp_integration.api_key': "config_api_key_getter_partial", # Only API key from config
+}
+
+
+# (name, factory, extra env, config values, direct params,
+#  expected (api_key, api_endpoint, max_retries, request_timeout))
+_CONFIG_CASES = [
+    ("init_full_override", MCPClient, {}, _CFG_FULL, {},
+     ("config_api_key", "https://config-api.mcp.dev/v1", 10, 30)),
+    # api_endpoint falls back to env, retries/timeout to defaults
+    ("init_partial_env_fallback", MCPClient, {}, _CFG_PARTIAL, {},
+     ("config_api_key", "https://test-api.mcp.dev/v1/env", 3, 15)),
+    # Direct api_key/max_retries win, config endpoint beats env, timeout from env
+    ("init_direct_priority", MCPClient, {"MCP_REQUEST_TIMEOUT": "25"}, _CFG_PRIORITY,
+     {"api_key": "direct_api_key", "max_retries": 5},
+     ("direct_api_key", "https://config-api.mcp.dev/v1", 5, 25)),
+    ("getter_full_override", get_mcp_client, {}, _CFG_GETTER_FULL, {},
+     ("config_api_key_getter", "https://config-api.mcp.dev/v1/getter", 12, 32)),
+    ("getter_partial_env_fallback", get_mcp_client, {"MCP_MAX_RETRIES": "7"}, _CFG_GETTER_PARTIAL, {},
+     ("config_api_key_getter_partial", "https://test-api.mcp.dev/v1/env", 7, 15)),
+]
+
+
+# Unpatched request helper, for tests that exercise it against a mocked requests.post
+_real_make_api_request = MCPClient._make_api_request
+
+
+class FakeCM:
+    """Minimal ConfigManager stand-in that records get() calls"""
+
+    def __init__(self, values=None):
+        self._d = values or {}
+        self.calls = []
+
+    def get(self, key, default=None):
+        self.calls.append((key, default))
+        return self._d.get(key, default)
+
+
+@pytest.fixture(autouse=True)
+def _reset_mcp_client():
+    """Reset the global mcp client instance for each test"""
+    mcp_integration._mcp_client_instance = None
+    yield
 
 
 class TestMCPClient(unittest.TestCase):
     """Test cases for the MCPClient class"""
 
+    @classmethod
+    def _start_class_patch(cls, patcher):
+        """Start a patcher for the whole class, registering its cleanup"""
+        mock = patcher.start()
+        cls.addClassCleanup(patcher.stop)
+        return mock
+
+    @classmethod
+    def setUpClass(cls):
+        """Set up environment shared by all tests in the class"""
+        # Set up environment variables once for the whole class; class
+        # cleanups also run when setUpClass fails part-way through
+        cls._start_class_patch(patch.dict(os.environ, {
+            "MCP_API_KEY": "test_api_key_env",
+            "MCP_API_ENDPOINT": "https://test-api.mcp.dev/v1/env"
+        }))
+
+        # Default client using only env vars (read-only across tests)
+        cls.client_env_only = MCPClient()
+
+        # Patch the HTTP layer and the API request helper once per class
+        cls.mock_post = cls._start_class_patch(patch('mcp_integration.requests.post'))
+        cls.mock_api_request = cls._start_class_patch(patch.object(MCPClient, '_make_api_request'))
+        # Retry backoff in _make_api_request must never sleep for real
+        cls._start_class_patch(patch('mcp_integration.time.sleep'))
+        # Freeze timestamps embedded in fallback content
+        cls._start_class_patch(patch('mcp_integration.datetime')).now.return_value = _FROZEN_NOW
+
     def setUp(self):
         """Set up test environment"""
-        # Set up environment variable for testing
-        os.environ["MCP_API_KEY"] = "test_api_key_env"
-        os.environ["MCP_API_ENDPOINT"] = "https://test-api.mcp.dev/v1/env"
-        # Reset the global mcp client instance for each test
-        patcher = patch('mcp_integration._mcp_client_instance', None)
-        self.addCleanup(patcher.stop)
-        patcher.start()
-        
-        # Default client using only env vars
-        self.client_env_only = MCPClient()
-
-
-    def tearDown(self):
-        """Clean up after tests"""
-        # Remove test environment variables
-        if "MCP_API_KEY" in os.environ:
-            del os.environ["MCP_API_KEY"]
-        if "MCP_API_ENDPOINT" in os.environ:
-            del os.environ["MCP_API_ENDPOINT"]
-        if "MCP_MAX_RETRIES" in os.environ: # If other tests set this
-            del os.environ["MCP_MAX_RETRIES"]
-        if "MCP_REQUEST_TIMEOUT" in os.environ: # If other tests set this
-            del os.environ["MCP_REQUEST_TIMEOUT"]
-
+        self.mock_post.reset_mock(return_value=True, side_effect=True)
+        self.mock_api_request.reset_mock(return_value=True, side_effect=True)
 
     def test_init_with_env_vars(self):
         """Test MCPClient initialization with environment variables only"""
@@ -64,140 +143,92 @@ class TestMCPClient(unittest.TestCase):
         self.assertEqual(client.request_timeout, 20)
 
     def test_init_with_config_manager_full_override(self):
-        """Test MCPClient initialization with ConfigManager providing all settings."""
-        mock_cm = MagicMock(spec=ConfigManager)
-        mock_cm.get.side_effect = lambda key, default=None: {
-            'mcp_integration.api_key': "config_api_key",
-            'mcp_integration.api_endpoint': "https://config-api.mcp.dev/v1",
-            'mcp_integration.max_retries': 10,
-            'mcp_integration.request_timeout': 30
-        }.get(key, default)
-
-        client = MCPClient(config_manager=mock_cm)
-        self.assertEqual(client.api_key, "config_api_key")
-        self.assertEqual(client.api_endpoint, "https://config-api.mcp.dev/v1")
-        self.assertEqual(client.max_retries, 10)
-        self.assertEqual(client.request_timeout, 30)
+        """Test MCPClient reads every mcp_integration setting from ConfigManager."""
+        mock_cm = FakeCM(_CFG_FULL)
+        MCPClient(config_manager=mock_cm)
         
         # Check that config_manager.get was called for each mcp_integration setting
-        mock_cm.get.assert_any_call('mcp_integration.api_key')
-        mock_cm.get.assert_any_call('mcp_integration.api_endpoint')
-        mock_cm.get.assert_any_call('mcp_integration.max_retries', 3) # Default passed to get
-        mock_cm.get.assert_any_call('mcp_integration.request_timeout', 15) # Default passed to get
-
-
-    def test_init_with_config_manager_partial_fallback_to_env(self):
-        """Test MCPClient init with ConfigManager (partial), falling back to env vars."""
-        mock_cm = MagicMock(spec=ConfigManager)
-        mock_cm.get.side_effect = lambda key, default=None: {
-            'mcp_integration.api_key': "config_api_key", # Only API key from config
-            # api_endpoint, max_retries, request_timeout will be None from config
-        }.get(key, default) # if key not in dict, returns default (None)
-
-        client = MCPClient(config_manager=mock_cm)
-        self.assertEqual(client.api_key, "config_api_key") # From config
-        self.assertEqual(client.api_endpoint, "https://test-api.mcp.dev/v1/env") # Fallback to env
-        self.assertEqual(client.max_retries, 3) # Default, as env not set for this
-        self.assertEqual(client.request_timeout, 15) # Default, as env not set for this
-
-    def test_init_with_config_manager_and_direct_params_priority(self):
-        """Test MCPClient init: direct params > config_manager > env_vars."""
-        mock_cm = MagicMock(spec=ConfigManager)
-        mock_cm.get.side_effect = lambda key, default=None: {
-            'mcp_integration.api_key': "config_api_key",
-            'mcp_integration.api_endpoint': "https://config-api.mcp.dev/v1",
-            'mcp_integration.max_retries': 10,
-        }.get(key, default)
-
-        # Direct param api_key should win over config and env
-        # Direct param max_retries should win over config
-        # Config endpoint should win over env (as no direct endpoint param)
-        # Timeout should fallback to env then default as not in direct or config
-        os.environ["MCP_REQUEST_TIMEOUT"] = "25" # Test env fallback for timeout
-
-        client = MCPClient(api_key="direct_api_key", max_retries=5, config_manager=mock_cm)
-        
-        self.assertEqual(client.api_key, "direct_api_key")
-        self.assertEqual(client.api_endpoint, "https://config-api.mcp.dev/v1")
-        self.assertEqual(client.max_retries, 5)
-        self.assertEqual(client.request_timeout, 25) # From env, then default would be 15
-
+        self.assertIn(('mcp_integration.api_key', None), mock_cm.calls)
+        self.assertIn(('mcp_integration.api_endpoint', None), mock_cm.calls)
+        self.assertIn(('mcp_integration.max_retries', 3), mock_cm.calls) # Default passed to get
+        self.assertIn(('mcp_integration.request_timeout', 15), mock_cm.calls) # Default passed to get
+
+    def test_config_manager_priority_cases(self):
+        """Test direct params > ConfigManager > env vars > defaults for MCPClient and get_mcp_client."""
+        for name, factory, env, cfg, direct, expected in _CONFIG_CASES:
+            with self.subTest(name=name):
+                mcp_integration._mcp_client_instance = None
+                with patch.dict(os.environ, env):
+                    client = factory(config_manager=FakeCM(cfg), **direct)
+                self.assertIsInstance(client, MCPClient)
+                self.assertEqual(
+                    (client.api_key, client.api_endpoint, client.max_retries, client.request_timeout),
+                    expected
+                )
 
     def test_init_missing_api_key_all_sources(self):
         """Test MCPClient initialization fails if API key is missing from all sources."""
-        if "MCP_API_KEY" in os.environ:
-            del os.environ["MCP_API_KEY"] # Remove from env
-        
-        mock_cm = MagicMock(spec=ConfigManager)
-        mock_cm.get.return_value = None # Config returns None for api_key
+        mock_cm = FakeCM() # Config returns None for api_key
 
-        with self.assertRaisesRegex(ValueError, "MCP API key not provided"):
-            MCPClient(config_manager=mock_cm) # No direct param, no env, no config
+        with patch.dict(os.environ):
+            del os.environ["MCP_API_KEY"] # Remove from env
+            with self.assertRaisesRegex(ValueError, "MCP API key not provided"):
+                MCPClient(config_manager=mock_cm) # No direct param, no env, no config
 
-    @patch('mcp_integration.requests.post')
-    def test_make_api_request_success(self, mock_post):
+    def test_make_api_request_success(self):
         """Test successful API request using the env-only client"""
         mock_response = Mock()
         mock_response.status_code = 200
         mock_response.json.return_value = {"code": "print('Hello, MCP!')"}
-        mock_post.return_value = mock_response
+        self.mock_post.return_value = mock_response
         
-        result = self.client_env_only._make_api_request("test/endpoint", {"param": "value"})
+        result = _real_make_api_request(self.client_env_only, "test/endpoint", dict(_EXPECTED_BODY))
         
-        mock_post.assert_called_once_with(
+        self.mock_post.assert_called_once_with(
             "https://test-api.mcp.dev/v1/env/test/endpoint", # Uses env endpoint
-            headers={
-                "Authorization": "Bearer test_api_key_env", # Uses env api key
-                "Content-Type": "application/json"
-            },
-            json={"param": "value"},
+            headers=_EXPECTED_HEADERS, # Uses env api key
+            json=_EXPECTED_BODY,
             timeout=15 # Default timeout
         )
         self.assertEqual(result, {"code": "print('Hello, MCP!')"})
 
-    @patch('mcp_integration.requests.post')
-    def test_make_api_request_error(self, mock_post):
+    def test_make_api_request_error(self):
         """Test API request with error response"""
         # Mock the error response
         mock_response = Mock()
         mock_response.status_code = 401
         mock_response.text = "Unauthorized"
-        mock_post.return_value = mock_response
+        self.mock_post.return_value = mock_response
         
         # Make the request
-        result = self.client_env_only._make_api_request("test/endpoint", {"param": "value"})
+        result = _real_make_api_request(self.client_env_only, "test/endpoint", {"param": "value"})
         
         # Verify the result is None for error response
         self.assertIsNone(result)
 
-    @patch('mcp_integration.requests.post')
-    def test_make_api_request_exception(self, mock_post):
+    def test_make_api_request_exception(self):
         """Test API request with exception"""
         # Mock an exception
-        mock_post.side_effect = Exception("Connection error")
+        self.mock_post.side_effect = Exception("Connection error")
         
-        # Mock the retry_with_backoff decorator to pass through the function
-        # and not actually apply retries for this test
-        with patch('mcp_integration.retry_with_backoff', side_effect=lambda *args, **kwargs: lambda f: f):
-            # The method should handle the exception and return None
-            result = self.client_env_only._make_api_request("test/endpoint", {"param": "value"})
-            self.assertIsNone(result)
-
-    @patch('mcp_integration.MCPClient._make_api_request')
-    def test_generate_code_success_with_env_client(self, mock_api_request):
-        mock_api_request.return_value = {"code": "def test(): return 'Hello, MCP!'"}
+        # The method should handle the exception and return None without retrying
+        result = _real_make_api_request(self.client_env_only, "test/endpoint", {"param": "value"})
+        self.assertIsNone(result)
+        self.mock_post.assert_called_once()
+
+    def test_generate_code_success_with_env_client(self):
+        self.mock_api_request.return_value = {"code": "def test(): return 'Hello, MCP!'"}
         code = self.client_env_only.generate_code("python")
         self.assertEqual(code, "def test(): return 'Hello, MCP!'")
-        mock_api_request.assert_called_once_with(
+        self.mock_api_request.assert_called_once_with(
             "generate/code", 
             {"task": "code_generation", "language": "python", "context": {"purpose": "github-contribution", "complexity": "low"}}
         )
 
-    @patch('mcp_integration.MCPClient._make_api_request')
-    def test_generate_code_with_context(self, mock_api_request):
+    def test_generate_code_with_context(self):
         """Test code generation with custom context"""
         # Mock successful API response
-        mock_api_request.return_value = {"code": "def advanced(): return 'Advanced MCP!'"}
+        self.mock_api_request.return_value = {"code": "def advanced(): return 'Advanced MCP!'"}
         
         # Call the method with custom context
         custom_context = {"purpose": "testing", "complexity": "high"}
@@ -207,7 +238,7 @@ class TestMCPClient(unittest.TestCase):
         self.assertEqual(code, "def advanced(): return 'Advanced MCP!'")
         
         # Verify the API request was made with correct parameters
-        mock_api_request.assert_called_once_with(
+        self.mock_api_request.assert_called_once_with(
             "generate/code", 
             {
                 "task": "code_generation",
@@ -216,11 +247,10 @@ class TestMCPClient(unittest.TestCase):
             }
         )
 
-    @patch('mcp_integration.MCPClient._make_api_request')
-    def test_generate_code_api_failure(self, mock_api_request):
+    def test_generate_code_api_failure(self):
         """Test code generation with API failure"""
         # Mock API failure
-        mock_api_request.return_value = None
+        self.mock_api_request.return_value = None
         
         # Call the method
         code = self.client_env_only.generate_code("python")
@@ -229,11 +259,10 @@ class TestMCPClient(unittest.TestCase):
         self.assertIn("# Generated fallback code", code)
         self.assertIn("def process_data(items):", code)
 
-    @patch('mcp_integration.MCPClient._make_api_request')
-    def test_generate_code_api_exception(self, mock_api_request):
+    def test_generate_code_api_exception(self):
         """Test code generation with API exception"""
         # Mock API exception
-        mock_api_request.side_effect = Exception("API error")
+        self.mock_api_request.side_effect = Exception("API error")
         
         # Call the method
         code = self.client_env_only.generate_code("python")
@@ -269,24 +298,12 @@ class TestMCPClient(unittest.TestCase):
         """Test fallback code generation for unknown language"""
         code = self.client_env_only._generate_fallback_code("unknown")
         # Check for the new format
-        self.assertIn("Fallback content for unknown generated at", code)
-
-    @patch('mcp_integration.MCPClient._make_api_request')
-    def test_generate_commit_message_success_env_client(self, mock_api_request):
-        mock_api_request.return_value = {"message": "Add new feature X"}
-        changes = [{"file_type": "python", "size": 100, "operation": "add"}]
-        message = self.client_env_only.generate_commit_message(changes, "test/repo")
-        self.assertEqual(message, "Add new feature X")
-        mock_api_request.assert_called_once_with(
-            "generate/commit", 
-            {"task": "commit_message", "repository": "test/repo", "changes": changes}
-        )
+        self.assertEqual(code, "Fallback content for unknown generated at 2024-01-01 00:00:00")
 
-    @patch('mcp_integration.MCPClient._make_api_request')
-    def test_analyze_repository_success(self, mock_api_request):
+    def test_analyze_repository_success(self):
         """Test successful repository analysis"""
         # Mock successful API response
-        mock_api_request.return_value = {
+        self.mock_api_request.return_value = {
             "language": "python",
             "patterns": ["camelCase", "docstrings"],
             "recommendations": ["add more tests"]
@@ -301,7 +318,7 @@ class TestMCPClient(unittest.TestCase):
         self.assertEqual(result["patterns"], ["camelCase", "docstrings"])
         
         # Verify the API request was made with correct parameters
-        mock_api_request.assert_called_once_with(
+        self.mock_api_request.assert_called_once_with(
             "analyze/repository", 
             {
                 "task": "repo_analysis",
@@ -309,11 +326,10 @@ class TestMCPClient(unittest.TestCase):
             }
         )
 
-    @patch('mcp_integration.MCPClient._make_api_request')
-    def test_analyze_repository_api_failure(self, mock_api_request):
+    def test_analyze_repository_api_failure(self):
         """Test repository analysis with API failure"""
         # Mock API failure
-        mock_api_request.return_value = None
+        self.mock_api_request.return_value = None
         
         # Call the method
         repo_data = {"files": ["main.py", "utils.py"]}
@@ -329,60 +345,14 @@ class TestMCPClient(unittest.TestCase):
         self.assertEqual(client.api_key, "test_api_key_env")
         self.assertEqual(client.api_endpoint, "https://test-api.mcp.dev/v1/env")
 
-    def test_get_mcp_client_with_config_full_override(self):
-        """Test get_mcp_client uses ConfigManager for all settings."""
-        mock_cm = MagicMock(spec=ConfigManager)
-        mock_cm.get.side_effect = lambda key, default=None: {
-            'mcp_integration.api_key': "config_api_key_getter",
-            'mcp_integration.api_endpoint': "https://config-api.mcp.dev/v1/getter",
-            'mcp_integration.max_retries': 12,
-            'mcp_integration.request_timeout': 32
-        }.get(key, default)
-
-        client = get_mcp_client(config_manager=mock_cm)
-        self.assertIsInstance(client, MCPClient)
-        self.assertEqual(client.api_key, "config_api_key_getter")
-        self.assertEqual(client.api_endpoint, "https://config-api.mcp.dev/v1/getter")
-        self.assertEqual(client.max_retries, 12)
-        self.assertEqual(client.request_timeout, 32)
-
-    def test_get_mcp_client_with_config_partial_fallback_to_env(self):
-        """Test get_mcp_client uses ConfigManager (partial) and falls back to env."""
-        mock_cm = MagicMock(spec=ConfigManager)
-        mock_cm.get.side_effect = lambda key, default=None: {
-            'mcp_integration.api_key': "config_api_key_getter_partial", # Only API key from config
-            # api_endpoint, max_retries, request_timeout will be None from config get calls
-        }.get(key, default)
-
-        # Set specific env vars for other fallbacks if not already set by global setUp
-        os.environ["MCP_MAX_RETRIES"] = "7"
-        
-        client = get_mcp_client(config_manager=mock_cm)
-        self.assertIsInstance(client, MCPClient)
-        self.assertEqual(client.api_key, "config_api_key_getter_partial") # From config
-        self.assertEqual(client.api_endpoint, "https://test-api.mcp.dev/v1/env") # Fallback to env
-        self.assertEqual(client.max_retries, 7) # Fallback to env (then default is 3)
-        self.assertEqual(client.request_timeout, 15) # Default (env not set for this, then default is 15)
-
-
     def test_get_mcp_client_missing_api_key_all_sources(self):
         """Test get_mcp_client returns None if API key is missing everywhere."""
-        if "MCP_API_KEY" in os.environ:
-            del os.environ["MCP_API_KEY"]
-        
-        mock_cm = MagicMock(spec=ConfigManager)
-        # Configure mock_cm.get to return None for 'mcp_integration.api_key'
-        # and other mcp keys to simulate them not being in config
-        def mock_get_side_effect(key, default=None):
-            if key == 'mcp_integration.api_key':
-                return None 
-            # for other mcp keys, return None to ensure they don't accidentally provide one
-            elif key.startswith('mcp_integration.'): 
-                return None
-            return default
-        mock_cm.get.side_effect = mock_get_side_effect
+        # No mcp_integration keys in config, so none of them can provide an API key
+        mock_cm = FakeCM()
         
-        client = get_mcp_client(config_manager=mock_cm)
+        with patch.dict(os.environ):
+            del os.environ["MCP_API_KEY"]
+            client = get_mcp_client(config_manager=mock_cm)
         self.assertIsNone(client)
 
     def test_get_mcp_client_is_singleton(self):
@@ -392,15 +362,34 @@ class TestMCPClient(unittest.TestCase):
         self.assertIs(client1, client2)
 
         # With config manager
-        patch('mcp_integration._mcp_client_instance', None).start() # Reset for this part
-        mock_cm = MagicMock(spec=ConfigManager)
-        mock_cm.get.return_value = "dummy_value_to_force_creation" # Ensure it tries to create
+        mock_cm = FakeCM({'mcp_integration.api_key': "dummy_value_to_force_creation"}) # Ensure it tries to create
         
+        mcp_integration._mcp_client_instance = None # Reset for this part
         client_cm1 = get_mcp_client(config_manager=mock_cm)
         client_cm2 = get_mcp_client(config_manager=mock_cm)
         self.assertIsNotNone(client_cm1) # Make sure it created an instance
         self.assertIs(client_cm1, client_cm2)
-        patch.stopall() # Important to stop patches started within a test method
+
+
+@pytest.fixture(scope="module")
+def client():
+    """MCP client configured with the same values as the env-only client, shared read-only"""
+    return MCPClient(api_key="test_api_key_env", api_endpoint="https://test-api.mcp.dev/v1/env")
+
+
+@pytest.mark.parametrize("api_ret,check", [
+    ({"message": "Add new feature X"}, lambda m: m == "Add new feature X"),
+    (None, lambda m: m.startswith("Update code in test/repo at")),
+])
+def test_commit_message(client, mocker, api_ret, check):
+    """Test commit message generation for API success and fallback on API failure"""
+    mock_api_request = mocker.patch.object(MCPClient, "_make_api_request", return_value=api_ret)
+    changes = [{"file_type": "python", "size": 100, "operation": "add"}]
+    assert check(client.generate_commit_message(changes, "test/repo"))
+    mock_api_request.assert_called_once_with(
+        "generate/commit",
+        {"task": "commit_message", "repository": "test/repo", "changes": changes}
+    )
 
 
 if __name__ == '__main__':
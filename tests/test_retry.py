@@ -2,33 +2,58 @@
 Tests for retry functionality
 """
 import pytest
-from unittest.mock import patch, Mock, call
+from unittest.mock import Mock, call
 import time
 from retry import RetryWithBackoff, RetryableError
 
 
+@pytest.fixture(autouse=True)
+def sleep_delays(monkeypatch):
+    """Replace retry sleeps with a plain list that records each requested delay"""
+    delays = []
+    monkeypatch.setattr('retry.time.sleep', delays.append)
+    return delays
+
+
+def failing_then(fail_times, exception=RetryableError, result="success"):
+    """
+    Build a side effect that raises for the first fail_times calls, then returns result
+
+    Exceptions are only created when raised. Wrap it in a Mock to count calls.
+    """
+    calls = [0]
+
+    def side_effect(*args, **kwargs):
+        calls[0] += 1
+        if calls[0] <= fail_times:
+            raise exception("Test error")
+        return result
+
+    return side_effect
+
+
 @pytest.fixture
 def mock_function():
     """Create a mock function that fails a specified number of times"""
     def create_mock(fail_times=3, exception=RetryableError):
-        mock = Mock()
-        mock.side_effect = [exception("Test error")] * fail_times + ["success"]
-        return mock
+        return Mock(side_effect=failing_then(fail_times, exception))
     return create_mock
 
 
+@pytest.fixture(scope="module")
+def default_retry():
+    """Shared RetryWithBackoff(max_retries=3, base_delay=0.01) reused across tests"""
+    return RetryWithBackoff(max_retries=3, base_delay=0.01)
+
+
 @pytest.mark.unit
-def test_retry_with_backoff_success():
+def test_retry_with_backoff_success(default_retry):
     """Test successful retry after failures"""
     # Create a function that fails twice then succeeds
-    test_func = Mock()
-    test_func.side_effect = [RetryableError("Error 1"), RetryableError("Error 2"), "success"]
-    
-    # Create retry wrapper
-    retry_wrapper = RetryWithBackoff(max_retries=3, base_delay=0.01)
+    test_func = Mock(side_effect=failing_then(2))
     
     # Wrap and call function
-    wrapped_func = retry_wrapper(test_func)
+    wrapped_func = default_retry(test_func)
     result = wrapped_func("test_arg", kwarg="test_kwarg")
     
     # Verify result and call count
@@ -42,19 +67,16 @@ def test_retry_with_backoff_success():
 
 
 @pytest.mark.unit
-def test_retry_with_backoff_max_retries_exceeded():
+def test_retry_with_backoff_max_retries_exceeded(default_retry):
     """Test that retry stops after max_retries and raises the last exception"""
     # Create a function that always fails
     test_func = Mock()
     test_func.side_effect = RetryableError("Persistent error")
     
-    # Create retry wrapper with limited retries
-    retry_wrapper = RetryWithBackoff(max_retries=3, base_delay=0.01)
-    
     # Wrap function and expect exception
-    wrapped_func = retry_wrapper(test_func)
+    wrapped_func = default_retry(test_func)
     
-    with pytest.raises(RetryableError, match="Persistent error"):
+    with pytest.raises(RetryableError):
         wrapped_func()
     
     # Verify call count matches max retries + 1 (initial attempt)
@@ -62,78 +84,49 @@ def test_retry_with_backoff_max_retries_exceeded():
 
 
 @pytest.mark.unit
-def test_retry_with_backoff_delay_calculation():
+def test_retry_with_backoff_delay_calculation(sleep_delays):
     """Test that retry uses exponential backoff for delays"""
-    test_func = Mock()
-    test_func.side_effect = [RetryableError("Error")] * 3 + ["success"]
-    
-    # Patch time.sleep and random.uniform to have deterministic testing
-    with patch('time.sleep') as mock_sleep, \
-         patch('random.uniform', return_value=1.0):  # Use 1.0 to not affect delay
-        # Create retry wrapper with known parameters for predictable delays
-        retry_wrapper = RetryWithBackoff(max_retries=3, base_delay=0.1, backoff_factor=2, jitter=False)
-        wrapped_func = retry_wrapper(test_func)
-        result = wrapped_func()
-        
-        # Verify correct sleep times (exponential backoff)
-        assert mock_sleep.call_count == 3
-        
-        # Don't test exact values, just verify the exponential growth pattern
-        first_delay = mock_sleep.call_args_list[0][0][0]
-        second_delay = mock_sleep.call_args_list[1][0][0]
-        third_delay = mock_sleep.call_args_list[2][0][0]
-        
-        # Verify roughly exponential growth (with some tolerance for implementation variance)
-        assert 0.05 <= first_delay <= 0.15, f"First delay {first_delay} should be around 0.1"
-        assert 0.15 <= second_delay <= 0.25, f"Second delay {second_delay} should be around 0.2"
-        assert 0.35 <= third_delay <= 0.45, f"Third delay {third_delay} should be around 0.4"
+    test_func = Mock(side_effect=failing_then(3))
+    
+    # Create retry wrapper with known parameters for predictable delays
+    retry_wrapper = RetryWithBackoff(max_retries=3, base_delay=0.1, backoff_factor=2, jitter=False)
+    wrapped_func = retry_wrapper(test_func)
+    assert wrapped_func() == "success"
+    
+    # Verify correct sleep times (exponential backoff)
+    assert sleep_delays == [0.1, 0.2, 0.4]
 
 
 @pytest.mark.unit
-def test_retry_with_backoff_jitter():
+def test_retry_with_backoff_jitter(sleep_delays, monkeypatch):
     """Test that jitter is applied to delay times"""
-    test_func = Mock()
-    test_func.side_effect = [RetryableError("Error")] * 3 + ["success"]
-    
-    # Use a fixed value for random.uniform to make tests deterministic
-    with patch('random.uniform', return_value=0.5) as mock_uniform, \
-         patch('time.sleep') as mock_sleep:
-        
-        # Create retry wrapper with jitter
-        retry_wrapper = RetryWithBackoff(max_retries=3, base_delay=0.1, jitter=True)
-        wrapped_func = retry_wrapper(test_func)
-        result = wrapped_func()
-        
-        # Verify random.uniform was called for jitter calculation
-        assert mock_uniform.call_count == 3
-        
-        # With our mock returning 0.5, verify that each delay is modified by the jitter
-        # Actual implementation might use different jitter formulas, so check the pattern instead
-        assert mock_sleep.call_count == 3
-        
-        first_delay = mock_sleep.call_args_list[0][0][0]
-        second_delay = mock_sleep.call_args_list[1][0][0]
-        
-        # Verify that with uniform returning 0.5, the first delay is roughly half the base delay
-        assert 0.04 <= first_delay <= 0.06, f"First delay {first_delay} should be around 0.05"
-        
-        # Verify that second delay is greater than first delay (showing backoff effect)
-        assert second_delay > first_delay, "Second delay should be greater than first delay"
+    test_func = Mock(side_effect=failing_then(3))
+    
+    # Record each jitter range and always scale by 0.5 to keep delays deterministic
+    uniforms = []
+    monkeypatch.setattr('random.uniform', lambda a, b: uniforms.append((a, b)) or 0.5)
+    
+    # Create retry wrapper with jitter
+    retry_wrapper = RetryWithBackoff(max_retries=3, base_delay=0.1, jitter=True)
+    wrapped_func = retry_wrapper(test_func)
+    assert wrapped_func() == "success"
+    
+    # One jitter draw per retry, each halving the backoff delay
+    assert uniforms == [(0.5, 1.5)] * 3
+    assert sleep_delays == [0.05, 0.1, 0.2]
 
 
 @pytest.mark.unit
-def test_retry_with_non_retryable_error():
+def test_retry_with_non_retryable_error(default_retry):
     """Test that non-retryable errors are raised immediately"""
     # Create a function that raises a non-retryable error
     test_func = Mock()
     test_func.side_effect = ValueError("Non-retryable error")
     
-    # Create retry wrapper
-    retry_wrapper = RetryWithBackoff(max_retries=3, base_delay=0.01)
-    wrapped_func = retry_wrapper(test_func)
+    wrapped_func = default_retry(test_func)
     
     # Expect the ValueError to be raised immediately
-    with pytest.raises(ValueError, match="Non-retryable error"):
+    with pytest.raises(ValueError):
         wrapped_func()
     
     # Verify function was only called once (no retries for non-retryable errors)
@@ -169,8 +162,7 @@ def test_retry_with_custom_retryable_errors():
 def test_retry_with_on_retry_callback():
     """Test that on_retry callback is called for each retry"""
     # Create a function that fails twice then succeeds
-    test_func = Mock()
-    test_func.side_effect = [RetryableError("Error 1"), RetryableError("Error 2"), "success"]
+    test_func = Mock(side_effect=failing_then(2))
     
     # Create on_retry callback
     on_retry_callback = Mock()
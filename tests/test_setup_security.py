@@ -2,55 +2,120 @@
 Unit tests for setup_security.py
 """
 import unittest
-import sys
 import os
 import tempfile
 import json
-from unittest.mock import patch, MagicMock, mock_open
+import io
+from unittest.mock import patch, MagicMock
 from pathlib import Path
+from functools import partial
+from types import SimpleNamespace
 import datetime
 import pytest
 
-# Add parent directory to path so we can import modules
-sys.path.insert(0, '.')
-
 # Import the module to test
 from setup_security import SecuritySetup
 
+
+# Fixed clock for key rotation checks; the stored key info is due 10 days later
+_FROZEN_NOW = datetime.datetime(2024, 1, 1)
+_KEY_INFO_JSON = json.dumps({
+    'key_id': 'abcd1234',
+    'created_at': '2024-01-01 00:00:00',
+    'rotation_due': '2024-01-11'
+})
+
+
+class _FrozenDatetime(datetime.datetime):
+    """datetime.datetime whose now() always returns _FROZEN_NOW"""
+    
+    @classmethod
+    def now(cls, tz=None):
+        return _FROZEN_NOW
+
+
+# Stand-in for the datetime module as seen by setup_security
+_FROZEN_DATETIME_MODULE = SimpleNamespace(datetime=_FrozenDatetime, timedelta=datetime.timedelta)
+
+
+class _MemoryPath:
+    """Minimal pathlib.Path stand-in whose file contents live in a dict"""
+    
+    def __init__(self, files, path):
+        self.files = files
+        self.path = str(path)
+    
+    def exists(self):
+        return self.path in self.files
+    
+    def read_text(self):
+        return self.files[self.path]
+    
+    def write_text(self, content):
+        self.files[self.path] = content
+
+
+class _FakeOpen:
+    """builtins.open stand-in that serves an in-memory buffer and records each call"""
+    
+    def __init__(self, content=''):
+        self.content = content
+        self.calls = []
+        self.buffer = None
+    
+    def __call__(self, file, mode='r', *args, **kwargs):
+        self.calls.append((file, mode))
+        self.buffer = io.BytesIO() if 'b' in mode else io.StringIO(self.content)
+        return self
+    
+    def __enter__(self):
+        return self.buffer
+    
+    def __exit__(self, *exc_info):
+        return False
+
+
+@pytest.fixture(autouse=True)
+def _dependencies_available(monkeypatch):
+    """Report the optional security dependencies as installed unless a test overrides it"""
+    monkeypatch.setattr('setup_security.DEPENDENCIES_AVAILABLE', True)
+
+
+@pytest.fixture
+def fernet_mocks(request, monkeypatch):
+    """Replace setup_security.Fernet with a mock class whose cipher encrypts to b'encrypted_data'"""
+    mock_cipher = MagicMock()
+    mock_cipher.encrypt.return_value = b'encrypted_data'
+    mock_fernet = MagicMock(return_value=mock_cipher)
+    mock_fernet.generate_key.return_value = b'test_key'
+    monkeypatch.setattr('setup_security.Fernet', mock_fernet)
+    request.instance.mock_fernet = mock_fernet
+    request.instance.mock_cipher = mock_cipher
+    return mock_fernet, mock_cipher
+
+
 class TestSecuritySetup(unittest.TestCase):
     """Test case for SecuritySetup class"""
     
+    @classmethod
+    def setUpClass(cls):
+        """Point SecuritySetup at one temporary directory shared by the class"""
+        temp_dir = tempfile.TemporaryDirectory()
+        cls.addClassCleanup(temp_dir.cleanup)
+        cls.temp_dir_path = temp_dir.name
+        
+        # Set paths to use temporary directory, restoring the originals afterwards
+        for attr, filename in (('ENV_FILE', '.env'), ('KEY_STORAGE_FILE', '.key_info')):
+            patcher = patch.object(SecuritySetup, attr, os.path.join(temp_dir.name, filename))
+            patcher.start()
+            cls.addClassCleanup(patcher.stop)
+    
     def setUp(self):
         """Set up test environment"""
-        # Create a temporary directory for test files
-        self.temp_dir = tempfile.TemporaryDirectory()
-        
-        # Save original values to restore later
-        self.original_env_file = SecuritySetup.ENV_FILE
-        self.original_key_storage = SecuritySetup.KEY_STORAGE_FILE
-        
-        # Set paths to use temporary directory
-        SecuritySetup.ENV_FILE = os.path.join(self.temp_dir.name, '.env')
-        SecuritySetup.KEY_STORAGE_FILE = os.path.join(self.temp_dir.name, '.key_info')
-        
-        # Setup environment for tests
-        self.original_environ = os.environ.copy()
-        os.environ["GITHUB_TOKEN"] = "test_token"
-    
-    def tearDown(self):
-        """Clean up after tests"""
-        # Restore original values
-        SecuritySetup.ENV_FILE = self.original_env_file
-        SecuritySetup.KEY_STORAGE_FILE = self.original_key_storage
-        
-        # Restore original environment
-        os.environ.clear()
-        os.environ.update(self.original_environ)
-        
-        # Clean up temporary directory
-        self.temp_dir.cleanup()
+        env_patcher = patch.dict(os.environ, {"GITHUB_TOKEN": "test_token"})
+        env_patcher.start()
+        self.addCleanup(env_patcher.stop)
     
-    @patch('setup_security.DEPENDENCIES_AVAILABLE', True)
     @patch('setup_security.dotenv')
     def test_init(self, mock_dotenv):
         """Test initialization of SecuritySetup"""
@@ -68,43 +133,43 @@ class TestSecuritySetup(unittest.TestCase):
         # Should have called install_dependencies
         mock_install.assert_called_once()
     
-    @patch('setup_security.DEPENDENCIES_AVAILABLE', True)
+    def _use_memory_env_files(self, files):
+        """Serve update_env_file's Path reads and writes from the files dict"""
+        for patcher in (patch('setup_security.Path', partial(_MemoryPath, files)),
+                        patch('os.chmod')):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+    
     def test_update_env_file_new(self):
         """Test updating a new .env file"""
-        # Ensure .env doesn't exist yet
-        if os.path.exists(SecuritySetup.ENV_FILE):
-            os.unlink(SecuritySetup.ENV_FILE)
+        # Start without any .env file
+        files = {}
+        self._use_memory_env_files(files)
         
         # Create instance and update env file
         setup = SecuritySetup()
         setup.update_env_file("new_test_token")
         
         # Check that file was created with correct content
-        self.assertTrue(os.path.exists(SecuritySetup.ENV_FILE))
-        
-        with open(SecuritySetup.ENV_FILE, 'r') as f:
-            content = f.read()
-            self.assertIn("GITHUB_TOKEN=new_test_token", content)
+        self.assertIn(SecuritySetup.ENV_FILE, files)
+        self.assertIn("GITHUB_TOKEN=new_test_token", files[SecuritySetup.ENV_FILE])
     
-    @patch('setup_security.DEPENDENCIES_AVAILABLE', True)
     def test_update_env_file_existing(self):
         """Test updating an existing .env file"""
-        # Create .env file with existing token
-        with open(SecuritySetup.ENV_FILE, 'w') as f:
-            f.write("GITHUB_TOKEN=old_token\nOTHER_VAR=value\n")
+        # Start with an .env file holding an existing token
+        files = {SecuritySetup.ENV_FILE: "GITHUB_TOKEN=old_token\nOTHER_VAR=value\n"}
+        self._use_memory_env_files(files)
         
         # Create instance and update env file
         setup = SecuritySetup()
         setup.update_env_file("updated_token")
         
         # Check that file was updated correctly
-        with open(SecuritySetup.ENV_FILE, 'r') as f:
-            content = f.read()
-            self.assertIn("GITHUB_TOKEN=updated_token", content)
-            self.assertIn("OTHER_VAR=value", content)
-            self.assertNotIn("old_token", content)
+        content = files[SecuritySetup.ENV_FILE]
+        self.assertIn("GITHUB_TOKEN=updated_token", content)
+        self.assertIn("OTHER_VAR=value", content)
+        self.assertNotIn("old_token", content)
     
-    @patch('setup_security.DEPENDENCIES_AVAILABLE', True)
     def test_replace_env_var(self):
         """Test replacing environment variables in content"""
         setup = SecuritySetup()
@@ -123,16 +188,11 @@ class TestSecuritySetup(unittest.TestCase):
         result = setup.replace_env_var(content, "VAR4", "new4")
         self.assertEqual(result, "VAR1=old1\nVAR2=keep2\nVAR3=old3")
     
-    @patch('setup_security.DEPENDENCIES_AVAILABLE', True)
+    @pytest.mark.usefixtures("fernet_mocks")
     @patch('setup_security.keyring')
-    @patch('setup_security.Fernet')
-    def test_setup_keyring(self, mock_fernet, mock_keyring):
+    def test_setup_keyring(self, mock_keyring):
         """Test keyring setup"""
-        # Setup mocks
-        mock_cipher = MagicMock()
-        mock_cipher.encrypt.return_value = b'encrypted_data'
-        mock_fernet.generate_key.return_value = b'test_key'
-        mock_fernet.return_value = mock_cipher
+        mock_fernet, mock_cipher = self.mock_fernet, self.mock_cipher
         
         # Create instance with mocked save_key_info
         setup = SecuritySetup()
@@ -149,15 +209,11 @@ class TestSecuritySetup(unittest.TestCase):
         )
         setup.save_key_info.assert_called_once_with(b'test_key')
     
-    @patch('setup_security.DEPENDENCIES_AVAILABLE', True)
+    @pytest.mark.usefixtures("fernet_mocks")
     @patch('setup_security.keyring')
-    @patch('setup_security.Fernet')
-    def test_setup_keyring_exception(self, mock_fernet, mock_keyring):
+    def test_setup_keyring_exception(self, mock_keyring):
         """Test keyring setup with exception"""
         # Setup mocks
-        mock_cipher = MagicMock()
-        mock_fernet.generate_key.return_value = b'test_key'
-        mock_fernet.return_value = mock_cipher
         mock_keyring.set_password.side_effect = Exception("Keyring error")
         
         # Create instance with mocked save_key_info
@@ -170,7 +226,6 @@ class TestSecuritySetup(unittest.TestCase):
         # Should not have called save_key_info
         setup.save_key_info.assert_not_called()
     
-    @patch('setup_security.DEPENDENCIES_AVAILABLE', True)
     def test_hash_key(self):
         """Test key hashing function"""
         setup = SecuritySetup()
@@ -191,7 +246,6 @@ class TestSecuritySetup(unittest.TestCase):
         result3 = setup.hash_key(b'different_key')
         self.assertNotEqual(result, result3)
     
-    @patch('setup_security.DEPENDENCIES_AVAILABLE', True)
     @patch('setup_security.keyring')
     def test_store_encryption_key_success(self, mock_keyring):
         """Test successful encryption key storage"""
@@ -209,7 +263,6 @@ class TestSecuritySetup(unittest.TestCase):
         # Should not have called fallback
         setup.store_key_in_file.assert_not_called()
     
-    @patch('setup_security.DEPENDENCIES_AVAILABLE', True)
     @patch('setup_security.keyring')
     def test_store_encryption_key_fallback(self, mock_keyring):
         """Test encryption key storage fallback"""
@@ -225,32 +278,36 @@ class TestSecuritySetup(unittest.TestCase):
         # Should have called fallback
         setup.store_key_in_file.assert_called_once_with(b'test_key')
     
-    @patch('setup_security.DEPENDENCIES_AVAILABLE', True)
     @patch('os.makedirs')
     @patch('os.chmod')
     def test_store_key_in_file(self, mock_chmod, mock_makedirs):
         """Test key storage in file"""
         setup = SecuritySetup()
         
-        # Create a file path for testing
-        test_key_path = os.path.join(self.temp_dir.name, '.encryption_key')
+        # Key file location under the mocked home directory
+        test_key_path = os.path.join(self.temp_dir_path, '.config', 'gh-contrib-hack', '.encryption_key')
         
         # Mock Path.home() to return a test path
-        with patch('pathlib.Path.home', return_value=Path(self.temp_dir.name)):
-            # Mock open to avoid actual file operations
-            with patch('builtins.open', mock_open()) as mock_file:
+        with patch('pathlib.Path.home', return_value=Path(self.temp_dir_path)):
+            # Serve open() from memory to avoid actual file operations
+            fake_open = _FakeOpen()
+            with patch('builtins.open', fake_open):
                 # Call method
                 setup.store_key_in_file(b'test_key')
         
         # Verify directory creation was called
         mock_makedirs.assert_called_once()
         
+        # Verify the raw key was written to the key file
+        self.assertEqual(fake_open.calls, [(test_key_path, 'wb')])
+        self.assertEqual(fake_open.buffer.getvalue(), b'test_key')
+        
         # Verify permissions setting was called
         mock_chmod.assert_called_once()
     
-    @patch('setup_security.DEPENDENCIES_AVAILABLE', True)
+    @patch('os.chmod')
     @patch('setup_security.keyring')
-    def test_save_key_info(self, mock_keyring):
+    def test_save_key_info(self, mock_keyring, mock_chmod):
         """Test key info saving"""
         # Mock methods
         setup = SecuritySetup()
@@ -259,39 +316,27 @@ class TestSecuritySetup(unittest.TestCase):
         
         test_key = b'test_key'
         
-        # Create sample key info data
-        key_info = {
-            "key_id": "abcd1234",
-            "created_at": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-            "rotation_due": (datetime.datetime.now() + datetime.timedelta(days=30)).strftime("%Y-%m-%d")
-        }
-        
-        # Mock the open and json.dump calls
-        mock_file = mock_open()
-        with patch('builtins.open', mock_file):
-            with patch('json.dump') as mock_json_dump:
-                setup.save_key_info(test_key)
-                
-                # Verify hash_key was called
-                setup.hash_key.assert_called_once_with(test_key)
-                
-                # Verify store_encryption_key was called
-                setup.store_encryption_key.assert_called_once_with(test_key)
-                
-                # Verify file was opened correctly
-                mock_file.assert_called_once_with(setup.KEY_STORAGE_FILE, 'w')
-                
-                # Verify json.dump was called correctly
-                self.assertTrue(mock_json_dump.called)
-                
-                # First argument is the data dict
-                call_args = mock_json_dump.call_args[0]
-                data_dict = call_args[0]
-                self.assertEqual(data_dict['key_id'], 'abcd1234')
-                self.assertIn('created_at', data_dict)
-                self.assertIn('rotation_due', data_dict)
+        # Capture the key info file in memory
+        fake_open = _FakeOpen()
+        with patch('builtins.open', fake_open):
+            setup.save_key_info(test_key)
+        
+        # Verify hash_key was called
+        setup.hash_key.assert_called_once_with(test_key)
+        
+        # Verify store_encryption_key was called
+        setup.store_encryption_key.assert_called_once_with(test_key)
+        
+        # Verify file was opened correctly and secured afterwards
+        self.assertEqual(fake_open.calls, [(setup.KEY_STORAGE_FILE, 'w')])
+        mock_chmod.assert_called_once_with(setup.KEY_STORAGE_FILE, 0o600)
+        
+        # Verify the written key info
+        written = fake_open.buffer.getvalue()
+        self.assertIn('"key_id": "abcd1234"', written)
+        self.assertIn('"created_at"', written)
+        self.assertIn('"rotation_due"', written)
     
-    @patch('setup_security.DEPENDENCIES_AVAILABLE', True)
     @patch('builtins.input', return_value='y')
     @patch('setup_security.getpass.getpass', return_value='new_token')
     def test_prompt_for_token(self, mock_getpass, mock_input):
@@ -305,11 +350,9 @@ class TestSecuritySetup(unittest.TestCase):
         # Verify result
         self.assertEqual(result, 'new_token')
     
-    @patch('setup_security.DEPENDENCIES_AVAILABLE', True)
     @patch('os.path.exists')
-    @patch('builtins.open', new_callable=mock_open)
     @patch('setup_security.keyring')
-    def test_audit_security(self, mock_keyring, mock_file, mock_exists):
+    def test_audit_security(self, mock_keyring, mock_exists):
         """Test security audit with no issues"""
         # Setup mocks
         mock_exists.return_value = True
@@ -319,24 +362,15 @@ class TestSecuritySetup(unittest.TestCase):
         with patch('os.stat') as mock_stat:
             mock_stat.return_value.st_mode = 0o100600  # Regular file with 600 permissions
             
-            # Mock file content for key info
-            today = datetime.datetime.now()
-            future = today + datetime.timedelta(days=10)
-            key_info = {
-                'key_id': 'abcd1234',
-                'created_at': today.strftime("%Y-%m-%d %H:%M:%S"),
-                'rotation_due': future.strftime("%Y-%m-%d")
-            }
-            mock_file.return_value.__enter__.return_value.read.return_value = json.dumps(key_info)
-            
-            # Run audit
+            # Run audit at a fixed time, with the key info file served from memory
             setup = SecuritySetup()
-            result = setup.audit_security()
+            with patch('setup_security.datetime', _FROZEN_DATETIME_MODULE), \
+                    patch('builtins.open', _FakeOpen(_KEY_INFO_JSON)):
+                result = setup.audit_security()
             
             # Should return True for no issues
             self.assertTrue(result)
     
-    @patch('setup_security.DEPENDENCIES_AVAILABLE', True)
     @patch('os.path.exists')
     def test_audit_security_with_issues(self, mock_exists):
         """Test security audit with issues"""
@@ -359,20 +393,14 @@ class TestSecuritySetup(unittest.TestCase):
                 # Should return False for issues found
                 self.assertFalse(result)
     
-    @patch('setup_security.DEPENDENCIES_AVAILABLE', True)
+    @pytest.mark.usefixtures("fernet_mocks")
     @patch('setup_security.SecuritySetup.prompt_for_token', return_value='new_token')
     @patch('setup_security.SecuritySetup.update_env_file')
-    @patch('setup_security.Fernet')
     @patch('setup_security.keyring')
     @patch('setup_security.SecuritySetup.save_key_info')
-    def test_rotate_credentials(self, mock_save_key, mock_keyring, mock_fernet, 
-                               mock_update_env, mock_prompt):
+    def test_rotate_credentials(self, mock_save_key, mock_keyring, mock_update_env, mock_prompt):
         """Test credential rotation"""
-        # Setup mocks
-        mock_cipher = MagicMock()
-        mock_cipher.encrypt.return_value = b'new_encrypted_data'
-        mock_fernet.generate_key.return_value = b'new_key'
-        mock_fernet.return_value = mock_cipher
+        mock_fernet, mock_cipher = self.mock_fernet, self.mock_cipher
         
         # Call method
         setup = SecuritySetup()
@@ -384,9 +412,6 @@ class TestSecuritySetup(unittest.TestCase):
         mock_fernet.generate_key.assert_called_once()
         mock_cipher.encrypt.assert_called_once_with(b'new_token')
         mock_keyring.set_password.assert_called_once_with(
-            setup.KEYRING_SERVICE, setup.KEYRING_USERNAME, 'new_encrypted_data'
+            setup.KEYRING_SERVICE, setup.KEYRING_USERNAME, 'encrypted_data'
         )
-        mock_save_key.assert_called_once_with(b'new_key')
-
-if __name__ == "__main__":
-    unittest.main() 
\ No newline at end of file
+        mock_save_key.assert_called_once_with(b'test_key') 
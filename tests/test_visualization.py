@@ -0,0 +1,268 @@
+import unittest
+import gc
+import os
+import base64
+import sqlite3
+import shutil
+import tempfile
+import logging
+import weakref
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+import numpy as np
+
+from config_loader import ConfigManager
+from visualization import ContributionVisualizer
+
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+
+# Suppress logging during tests unless specifically testing logging
+logging.disable(logging.CRITICAL)
+
+
+class VisualizerTestCase(unittest.TestCase):
+    """Visualizer over a temporary database with a few days of contributions"""
+
+    def setUp(self):
+        # Each test gets its own database and chart cache directory
+        self.temp_dir = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.temp_dir, 'contributions.db')
+        conn = sqlite3.connect(self.db_path)
+        conn.execute('''CREATE TABLE contributions
+                        (timestamp DATETIME, repo TEXT, commit_count INTEGER,
+                         lines_changed INTEGER, file_type TEXT)''')
+        self.today = datetime.now().replace(hour=12, minute=0, second=0, microsecond=0)
+        rows = [
+            (self.today - timedelta(days=1), 'test/repo1', 2),
+            (self.today - timedelta(days=1), 'test/repo2', 3),
+            (self.today - timedelta(days=4), 'test/repo1', 1),
+            (self.today - timedelta(days=9), 'test/repo2', 4),
+        ]
+        conn.executemany('INSERT INTO contributions VALUES (?, ?, ?, 10, "py")',
+                         [(ts.isoformat(), repo, commits) for ts, repo, commits in rows])
+        conn.commit()
+        conn.close()
+
+        self.config_manager = ConfigManager(config_path=os.path.join(self.temp_dir, 'config.yml'))
+        self.config_manager.set('database.path', self.db_path)
+        self.config_manager.set('visualization.cache_dir', self.temp_dir)
+        self.visualizer = ContributionVisualizer(self.config_manager)
+
+    def tearDown(self):
+        self.visualizer.close()
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+        logging.disable(logging.NOTSET) # Re-enable logging
+
+    def _insert(self, timestamp, repo='test/repo1', commits=1):
+        conn = sqlite3.connect(self.db_path)
+        with conn:
+            conn.execute('INSERT INTO contributions VALUES (?, ?, ?, 10, "py")',
+                         (timestamp.isoformat(), repo, commits))
+        conn.close()
+
+
+class TestContributionData(VisualizerTestCase):
+
+    def _daily_totals(self):
+        conn = sqlite3.connect(self.db_path)
+        totals = dict(conn.execute(
+            'SELECT DATE(timestamp), SUM(commit_count) FROM contributions GROUP BY 1'))
+        conn.close()
+        return totals
+
+    def test_series_is_dense_and_zero_filled(self):
+        """Every day in the window is present, with zero for days without contributions."""
+        dates, counts = self.visualizer._get_contribution_data(days=30)
+
+        self.assertEqual(dates.dtype, np.dtype('datetime64[D]'))
+        self.assertEqual(len(dates), 31)
+        self.assertEqual(len(counts), 31)
+        self.assertEqual(str(dates[-1]), self.today.date().isoformat())
+        np.testing.assert_array_equal(np.diff(dates), np.ones(30, dtype='timedelta64[D]'))
+
+        totals = self._daily_totals()
+        expected = [totals.get(str(day), 0) for day in dates]
+        np.testing.assert_array_equal(counts, expected)
+        self.assertEqual(np.count_nonzero(counts), 3)
+        self.assertEqual(counts[-2], 5)
+
+    def test_series_is_memoized_until_database_changes(self):
+        """Repeated calls share the cached arrays; a new row invalidates them."""
+        first_dates, first_counts = self.visualizer._get_contribution_data(days=30)
+        again_dates, again_counts = self.visualizer._get_contribution_data(days=30)
+        self.assertIs(again_dates, first_dates)
+        self.assertIs(again_counts, first_counts)
+        self.assertFalse(first_counts.flags.writeable)
+
+        self._insert(self.today, commits=7)
+
+        dates, counts = self.visualizer._get_contribution_data(days=30)
+        self.assertIsNot(counts, first_counts)
+        self.assertEqual(counts[-1], 7)
+        np.testing.assert_array_equal(counts[:-1], first_counts[:-1])
+
+    def test_invalidate_clears_memoized_series(self):
+        """invalidate() drops the memoized series."""
+        first_counts = self.visualizer._get_contribution_data(days=30)[1]
+        self.visualizer.invalidate()
+        counts = self.visualizer._get_contribution_data(days=30)[1]
+        self.assertIsNot(counts, first_counts)
+        np.testing.assert_array_equal(counts, first_counts)
+
+    def test_memoized_visualizer_is_freed_without_gc(self):
+        """The series cache holds no reference back to its visualizer."""
+        visualizer = ContributionVisualizer(self.config_manager)
+        visualizer._get_contribution_data(days=30)
+        visualizer_ref = weakref.ref(visualizer)
+        gc.disable()
+        try:
+            del visualizer
+            self.assertIsNone(visualizer_ref())
+        finally:
+            gc.enable()
+
+    def test_close_clears_memoized_series(self):
+        """close() drops the memoized series along with the connection."""
+        self.visualizer._get_contribution_data(days=30)
+        self.visualizer.close()
+        self.assertEqual(len(self.visualizer._series_cache), 0)
+
+    def test_empty_window_returns_empty_arrays(self):
+        """A window without contributions yields empty arrays rather than zeros."""
+        conn = sqlite3.connect(self.db_path)
+        with conn:
+            conn.execute('DELETE FROM contributions')
+        conn.close()
+
+        dates, counts = self.visualizer._get_contribution_data(days=30)
+        self.assertEqual(len(dates), 0)
+        self.assertEqual(len(counts), 0)
+
+
+class TestChartSaving(VisualizerTestCase):
+
+    def test_save_path_without_extension_writes_png(self):
+        """A save_path without an extension and no fmt falls back to PNG."""
+        save_path = os.path.join(self.temp_dir, 'noext')
+
+        result = self.visualizer.generate_heatmap(save_path=save_path)
+
+        self.assertEqual(result, save_path)
+        with open(save_path, 'rb') as f:
+            self.assertEqual(f.read(8), PNG_SIGNATURE)
+
+    def test_explicit_format_overrides_extension(self):
+        """fmt decides the encoding even when the file name says otherwise."""
+        save_path = os.path.join(self.temp_dir, 'chart.png')
+
+        self.visualizer.generate_streak_chart(save_path=save_path, fmt='svg')
+
+        with open(save_path, 'rb') as f:
+            self.assertIn(b'<svg', f.read(512))
+
+    def test_bytes_and_base64_output_match_file(self):
+        """bytes and base64 outputs are the image written to disk, also without an extension."""
+        for save_path in (os.path.join(self.temp_dir, 'timeline.svg'),
+                          os.path.join(self.temp_dir, 'timeline')):
+            with self.subTest(save_path=save_path):
+                data = self.visualizer.generate_activity_timeline(save_path=save_path, output='bytes')
+                with open(save_path, 'rb') as f:
+                    self.assertEqual(data, f.read())
+
+                encoded = self.visualizer.generate_activity_timeline(save_path=save_path, output='base64')
+                with open(save_path, 'rb') as f:
+                    self.assertEqual(base64.b64decode(encoded), f.read())
+
+    def test_cached_chart_output_matches_cache_file(self):
+        """Without a save_path, the outputs come from the image cache, rendered or not."""
+        path = self.visualizer.generate_repo_distribution()
+        with open(path, 'rb') as f:
+            cached = f.read()
+
+        self.assertEqual(self.visualizer.generate_repo_distribution(output='bytes'), cached)
+        self.assertEqual(base64.b64decode(self.visualizer.generate_repo_distribution(output='base64')), cached)
+
+        rendered = self.visualizer.generate_repo_distribution(force=True, output='bytes')
+        with open(path, 'rb') as f:
+            self.assertEqual(rendered, f.read())
+
+    def test_cached_charts_default_to_png(self):
+        """Without a fmt or configured format, cached charts are PNG."""
+        path = self.visualizer.generate_streak_chart()
+        self.assertTrue(path.endswith('.png'))
+        with open(path, 'rb') as f:
+            self.assertEqual(f.read(8), PNG_SIGNATURE)
+
+        self.config_manager.set('visualization.formats', {'streak': 'svg'})
+        configured = ContributionVisualizer(self.config_manager)
+        self.addCleanup(configured.close)
+        self.assertTrue(configured.generate_streak_chart().endswith('.svg'))
+
+    def test_cache_file_is_shared_across_visualizers(self):
+        """Visualizers over the same database state use the same cache file."""
+        first_path = self.visualizer.generate_repo_distribution()
+        self._insert(self.today, commits=2)
+
+        path = self.visualizer.generate_repo_distribution()
+        self.assertNotEqual(path, first_path)
+
+        other = ContributionVisualizer(self.config_manager)
+        self.addCleanup(other.close)
+        self.assertEqual(other.generate_repo_distribution(), path)
+
+    def test_older_cache_files_are_removed(self):
+        """Writing a chart to the cache removes its renders from older data only."""
+        stale_path = self.visualizer.generate_repo_distribution()
+        other_days = self.visualizer.generate_heatmap(days=30)
+        self._insert(self.today, commits=2)
+
+        path = self.visualizer.generate_repo_distribution()
+
+        self.assertTrue(os.path.exists(path))
+        self.assertFalse(os.path.exists(stale_path))
+        self.assertTrue(os.path.exists(other_days))
+
+
+class TestRepoDistribution(VisualizerTestCase):
+
+    def _chart_rows(self):
+        """Render the distribution chart and return the rows it was drawn from"""
+        rows = []
+        query = self.visualizer._query
+
+        def capture(*args):
+            result = query(*args)
+            rows.extend(result)
+            return result
+
+        with patch.object(self.visualizer, '_query', side_effect=capture):
+            self.assertIsNotNone(self.visualizer.generate_repo_distribution(force=True))
+        return rows
+
+    def _chart_labels(self):
+        return [text.get_text() for text in self.visualizer._figures['repos'].axes[0].texts
+                if not text.get_text().endswith('%')]
+
+    def test_few_repositories_have_no_other_slice(self):
+        """With ten repositories or fewer every one gets its own slice."""
+        rows = [row for row in self._chart_rows() if row[1] is not None]
+        self.assertEqual([row[0] for row in rows], ['test/repo2', 'test/repo1'])
+        self.assertEqual(self._chart_labels(), ['test/repo2', 'test/repo1'])
+
+    def test_repositories_beyond_top_ten_are_summed(self):
+        """Repositories past the top ten are drawn as one 'Other' slice with their total."""
+        for index in range(12):
+            self._insert(self.today, repo=f'extra/repo{index:02d}', commits=100 - index)
+
+        rows = self._chart_rows()
+
+        expected = [f'extra/repo{index:02d}' for index in range(10)] + ['Other']
+        self.assertEqual([row[0] for row in rows], expected)
+        self.assertEqual(self._chart_labels(), expected)
+        # extra/repo10 and 11, plus test/repo1 (3 commits) and test/repo2 (7)
+        self.assertEqual(rows[-1][1], 90 + 89 + 3 + 7)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,249 @@
+import unittest
+import os
+import gzip
+import sqlite3
+import shutil
+import tempfile
+import time
+import logging
+from datetime import datetime, timedelta
+from unittest.mock import Mock, patch
+
+from config_loader import ConfigManager
+from web_interface import WebInterface
+
+# Suppress logging during tests unless specifically testing logging
+logging.disable(logging.CRITICAL)
+
+
+class WebInterfaceTestCase(unittest.TestCase):
+    """Web interface over a temporary database, driven through Flask's test client"""
+
+    @classmethod
+    def setUpClass(cls):
+        # Charts are rendered once per class; the tests only read them
+        cls.temp_dir = tempfile.mkdtemp()
+        db_path = os.path.join(cls.temp_dir, 'contributions.db')
+        conn = sqlite3.connect(db_path)
+        conn.execute('''CREATE TABLE contributions
+                        (timestamp DATETIME, repo TEXT, commit_count INTEGER,
+                         lines_changed INTEGER, file_type TEXT)''')
+        now = datetime.now()
+        conn.executemany('INSERT INTO contributions VALUES (?, ?, ?, 10, "py")',
+                         [((now - timedelta(days=day)).isoformat(), f'test/repo{day % 3}', day % 4 + 1)
+                          for day in range(60)])
+        conn.commit()
+        conn.close()
+
+        config_manager = ConfigManager(config_path=os.path.join(cls.temp_dir, 'config.yml'))
+        config_manager.set('database.path', db_path)
+        config_manager.set('visualization.cache_dir', cls.temp_dir)
+        # PNG is the default; opt two charts in to other formats
+        config_manager.set('visualization.formats', {'heatmap': 'webp', 'streak': 'svg'})
+        config_manager.set('notifications.enabled', False)
+        cls.interface = WebInterface(config_manager)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.interface.visualizer.close()
+        shutil.rmtree(cls.temp_dir, ignore_errors=True)
+        logging.disable(logging.NOTSET) # Re-enable logging
+
+    def setUp(self):
+        self.client = self.interface.app.test_client()
+
+
+class TestVisualizationImage(WebInterfaceTestCase):
+
+    def test_image_has_etag_and_revalidates(self):
+        """An image response carries an ETag, and a matching If-None-Match gets a 304."""
+        response = self.client.get('/api/vizualization/heatmap/image')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.mimetype, 'image/webp')
+        self.assertIsNotNone(response.headers.get('ETag'))
+        self.assertEqual(response.cache_control.max_age, 60)
+        body = response.get_data()
+
+        revalidated = self.client.get('/api/vizualization/heatmap/image',
+                                      headers={'If-None-Match': response.headers['ETag']})
+        self.assertEqual(revalidated.status_code, 304)
+        self.assertEqual(revalidated.get_data(), b'')
+
+        # The JSON route serves the same cached render
+        data = self.client.get('/api/vizualization/heatmap').get_json()
+        self.assertEqual(data['status'], 'success')
+        self.assertEqual(data['mime_type'], 'image/webp')
+        self.assertEqual(self.interface._cached_visualization('heatmap')[0], body)
+
+    def test_stale_etag_gets_full_image(self):
+        """A non-matching If-None-Match gets the image again."""
+        response = self.client.get('/api/vizualization/streak/image',
+                                   headers={'If-None-Match': '"not-the-current-etag"'})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.get_data())
+
+    def test_default_format_is_png(self):
+        """Charts without a configured format are served as PNG."""
+        response = self.client.get('/api/vizualization/timeline/image')
+        self.assertEqual(response.mimetype, 'image/png')
+        self.assertEqual(self.client.get('/api/vizualization/timeline').get_json()['mime_type'], 'image/png')
+
+    def test_unknown_type_is_not_found(self):
+        """Unknown visualization types get a 404."""
+        response = self.client.get('/api/vizualization/bogus/image')
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(response.get_json()['status'], 'error')
+
+
+class TestResponseCompression(WebInterfaceTestCase):
+
+    def test_binary_image_is_not_gzipped(self):
+        """Already compressed image formats are sent as they are."""
+        response = self.client.get('/api/vizualization/heatmap/image',
+                                   headers={'Accept-Encoding': 'gzip'})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('Content-Encoding', response.headers)
+        self.assertFalse(response.headers['ETag'].startswith('W/'))
+
+    def test_no_gzip_without_accept_encoding(self):
+        """Clients that do not accept gzip get the plain body."""
+        for url in ('/api/vizualization/streak/image', '/api/stats'):
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, 200)
+                self.assertNotIn('Content-Encoding', response.headers)
+                self.assertIn('Accept-Encoding', response.vary)
+
+    def test_svg_is_gzipped_and_still_revalidates(self):
+        """Text images are gzipped with a weak ETag that still matches on revalidation."""
+        plain = self.client.get('/api/vizualization/streak/image')
+
+        response = self.client.get('/api/vizualization/streak/image',
+                                   headers={'Accept-Encoding': 'gzip'})
+        self.assertEqual(response.headers.get('Content-Encoding'), 'gzip')
+        self.assertEqual(gzip.decompress(response.get_data()), plain.get_data())
+        self.assertEqual(int(response.headers['Content-Length']), len(response.get_data()))
+        self.assertTrue(response.headers['ETag'].startswith('W/'))
+
+        revalidated = self.client.get('/api/vizualization/streak/image',
+                                      headers={'Accept-Encoding': 'gzip',
+                                               'If-None-Match': response.headers['ETag']})
+        self.assertEqual(revalidated.status_code, 304)
+
+
+class TestVisualizationWorker(WebInterfaceTestCase):
+
+    def test_worker_runs_only_while_started(self):
+        """The background renderer is not started by the constructor, and stops with the server."""
+        self.assertIsNone(self.interface._viz_thread)
+
+        with patch.object(self.interface, '_render_visualization'):
+            self.interface._start_viz_worker()
+            thread = self.interface._viz_thread
+            self.assertTrue(thread.is_alive())
+            self.interface._stop_viz_worker()
+
+        self.assertFalse(thread.is_alive())
+        self.assertIsNone(self.interface._viz_thread)
+
+    def test_stale_image_is_rerendered_without_worker(self):
+        """Without the worker, an image older than the refresh interval is rendered again."""
+        self.interface._cached_visualization('timeline')
+        render = self.interface._render_visualization
+
+        with patch.object(self.interface, '_render_visualization', wraps=render) as rendered:
+            self.interface._cached_visualization('timeline')
+            rendered.assert_not_called()
+
+            with patch('web_interface.VIZ_REFRESH_INTERVAL', 0.0):
+                self.interface._cached_visualization('timeline')
+            rendered.assert_called_once_with('timeline')
+
+    def test_failed_refresh_serves_last_image(self):
+        """A failing re-render keeps the previous image."""
+        image = self.interface._cached_visualization('timeline')
+
+        with patch.object(self.interface, '_render_visualization', side_effect=RuntimeError('boom')), \
+                patch('web_interface.VIZ_REFRESH_INTERVAL', 0.0):
+            self.assertEqual(self.interface._cached_visualization('timeline'), image)
+
+
+class TestNotificationJobs(WebInterfaceTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.original_manager = self.interface.notification_manager
+        self.interface.notification_manager = Mock()
+        self.interface.notification_manager.notify.return_value = {'desktop': True}
+
+    def tearDown(self):
+        self.interface.notification_manager = self.original_manager
+
+    def _queue(self):
+        response = self.client.post('/actions/test-notification', data={'level': 'info'})
+        self.assertEqual(response.status_code, 202)
+        job_id = response.get_json()['job_id']
+        self.interface._notification_jobs[job_id].result(timeout=5)
+        # Done callbacks run just after result() is available
+        deadline = time.monotonic() + 5
+        while job_id not in self.interface._notification_finished and time.monotonic() < deadline:
+            time.sleep(0.01)
+        return job_id
+
+    def test_finished_job_is_reported_once(self):
+        """A finished job reports its results on the next poll, then is forgotten."""
+        job_id = self._queue()
+
+        data = self.client.get(f'/actions/test-notification/{job_id}').get_json()
+        self.assertEqual(data, {'status': 'success', 'results': {'desktop': True}})
+        self.assertNotIn(job_id, self.interface._notification_finished)
+
+        response = self.client.get(f'/actions/test-notification/{job_id}')
+        self.assertEqual(response.status_code, 404)
+
+    def test_unpolled_jobs_expire(self):
+        """Jobs nobody polls are dropped once they have been finished for the TTL."""
+        stale_job = self._queue()
+        self.assertIn(stale_job, self.interface._notification_finished)
+
+        with patch('web_interface.NOTIFICATION_JOB_TTL', 0.0):
+            fresh_job = self._queue()
+
+        self.assertNotIn(stale_job, self.interface._notification_jobs)
+        self.assertNotIn(stale_job, self.interface._notification_finished)
+        self.assertIn(fresh_job, self.interface._notification_jobs)
+        response = self.client.get(f'/actions/test-notification/{stale_job}')
+        self.assertEqual(response.status_code, 404)
+
+
+class TestTemplateCache(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.config_manager = ConfigManager(config_path=os.path.join(self.temp_dir, 'config.yml'))
+        self.config_manager.set('database.path', os.path.join(self.temp_dir, 'contributions.db'))
+        self.config_manager.set('notifications.enabled', False)
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_configured_cache_dir_is_used(self):
+        """Compiled templates go to ui.web_interface.jinja_cache_dir."""
+        cache_dir = os.path.join(self.temp_dir, 'jinja')
+        self.config_manager.set('ui.web_interface.jinja_cache_dir', cache_dir)
+        interface = WebInterface(self.config_manager)
+        self.assertEqual(interface.app.jinja_env.bytecode_cache.directory, cache_dir)
+        self.assertTrue(os.path.isdir(cache_dir))
+
+    def test_unwritable_cache_dir_disables_cache(self):
+        """A cache directory that cannot be created leaves the interface running without one."""
+        blocker = os.path.join(self.temp_dir, 'not-a-dir')
+        open(blocker, 'w').close()
+        self.config_manager.set('ui.web_interface.jinja_cache_dir', os.path.join(blocker, 'jinja'))
+        interface = WebInterface(self.config_manager)
+        self.assertIsNone(interface.app.jinja_env.bytecode_cache)
+        self.assertEqual(interface.app.test_client().get('/').status_code, 200)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -6,19 +6,86 @@ including heatmaps, streak analysis, and activity timelines.
 """
 import sqlite3
 import numpy as np
+import matplotlib
+matplotlib.use('Agg')  # Charts are only rendered to files, never shown
+matplotlib.rcParams['agg.path.chunksize'] = 10000  # Draw long line paths in chunks
 import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
+from matplotlib.colors import Normalize
 from datetime import datetime, timedelta
 import calendar
 import tempfile
 import os
 from pathlib import Path
 import io
-import base64
-from typing import Dict, List, Tuple, Optional, Union
+import binascii
+import hashlib
+import threading
+import functools
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Dict, Iterator, List, Tuple, Optional, Union
 
 from config_loader import ConfigManager
 
+# Default resolution of raster chart images, overridable with visualization.dpi
+DEFAULT_DPI = 96
+
+# Read size for streaming images into base64 (57 input bytes per 76-char line)
+BASE64_CHUNK_SIZE = 57 * 1024
+
+# First bytes of every SQLite 3 database file
+SQLITE_HEADER = b'SQLite format 3\x00'
+
+# Rows fetched per round trip for queries read in batches
+FETCH_BATCH_SIZE = 4096
+
+# Daily series kept per visualizer, one per (days, data version)
+SERIES_CACHE_SIZE = 8
+
+# Default image formats for cached charts. visualization.formats can opt
+# individual charts in to others, e.g. SVG for the line and pie charts or
+# WebP for the heatmap.
+CHART_FORMATS = {
+    'heatmap': 'png',
+    'streak': 'png',
+    'timeline': 'png',
+    'repos': 'png',
+}
+
+# Forms a generator can return a chart in
+CHART_OUTPUTS = ('path', 'bytes', 'base64')
+
+# Figure margins restored from rcParams when a Figure is reused
+SUBPLOT_PARAMS = ('left', 'right', 'bottom', 'top', 'wspace', 'hspace')
+
+# Covering indexes for the daily and per-repository aggregations
+CHART_INDEXES = {
+    'idx_contrib_date': 'CREATE INDEX IF NOT EXISTS idx_contrib_date ON contributions(DATE(timestamp), commit_count)',
+    'idx_contrib_repo': 'CREATE INDEX IF NOT EXISTS idx_contrib_repo ON contributions(repo, commit_count)',
+}
+
+
+def _empty_contribution_data() -> Tuple[np.ndarray, np.ndarray]:
+    """Typed (dates, counts) arrays for a period without contributions"""
+    return np.array([], dtype='datetime64[D]'), np.array([], dtype=np.int64)
+
+
+def _uses_chart_figure(name: str):
+    """Serialize generation of one chart type, which draws on that chart's Figure"""
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            with self._figure_locks[name]:
+                return method(self, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
 class ContributionVisualizer:
+    # Resolved database paths whose SQLite header has already been checked
+    _validated_paths: set = set()
+    
     def __init__(self, config_manager: Optional[ConfigManager] = None, db_path: Optional[str] = None):
         """
         Initialize the contribution visualizer
@@ -35,144 +102,460 @@ class ContributionVisualizer:
             print("Warning: Passing db_path directly to ContributionVisualizer is deprecated. Use ConfigManager.")
 
         self.db_path = effective_db_path
+        self._conn = None
+        self._conn_lock = threading.Lock()
+        self._has_daily_rollup = False  # Set when the connection is opened
         self._check_database()
         
+        # Memoized daily series as {(days, data version): (dates, counts)},
+        # least recently used first
+        self._series_cache: OrderedDict = OrderedDict()
+        self._series_lock = threading.Lock()
+        
         # Set default styles for consistent visuals
         plt.style.use(config_manager.get('visualization.style', 'ggplot') if config_manager else 'ggplot')
         
+        # Each chart type draws on its own Figure, cleared and reused per render
+        self._figures: Dict[str, Figure] = {}
+        self._figure_locks = {name: threading.Lock() for name in CHART_FORMATS}
+        
+        # Image format of each cached chart
+        configured_formats = config_manager.get('visualization.formats', None) if config_manager else None
+        self.formats = {**CHART_FORMATS, **(configured_formats or {})}
+        
+        # Resolution of raster images
+        self.dpi = config_manager.get('visualization.dpi', DEFAULT_DPI) if config_manager else DEFAULT_DPI
+        
+        # Heatmap color mapping similar to GitHub's, looked up once
+        self._cmap = plt.get_cmap('Greens')
+        
         # Create cache directory for exports
         cache_dir_base = config_manager.get('visualization.cache_dir', tempfile.gettempdir()) if config_manager else tempfile.gettempdir()
         self.cache_dir = Path(cache_dir_base) / 'github_contrib_viz'
         os.makedirs(self.cache_dir, exist_ok=True)
         
     def _check_database(self):
-        """Check if the database exists and has the expected schema"""
+        """
+        Check that the database exists and is a SQLite file
+        
+        Only the file header is read, once per path for the process; the
+        connection is opened on the first query, and a missing contributions
+        table surfaces there as a database error.
+        """
         if not os.path.exists(self.db_path):
             raise FileNotFoundError(f"Database file not found: {self.db_path}")
             
-        try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
+        resolved_path = os.path.realpath(self.db_path)
+        if resolved_path in ContributionVisualizer._validated_paths:
+            return
             
-            # Check if contributions table exists
-            cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='contributions'")
-            if not cursor.fetchone():
-                raise ValueError("Database does not contain the contributions table")
-                
+        with open(self.db_path, 'rb') as db_file:
+            if db_file.read(len(SQLITE_HEADER)) != SQLITE_HEADER:
+                raise ValueError(f"Not a SQLite database: {self.db_path}")
+        ContributionVisualizer._validated_paths.add(resolved_path)
+
+    def _connection(self) -> sqlite3.Connection:
+        """Return the shared connection, opening it on first use (hold _conn_lock)"""
+        if self._conn is None:
+            self._conn = self._connect()
+            self._ensure_indexes()
+            
+            # Daily totals maintained by ContributionAnalytics, if present
+            self._has_daily_rollup = self._conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type='table' AND name='contributions_daily'"
+            ).fetchone() is not None
+        return self._conn
+
+    def _ensure_indexes(self):
+        """
+        Create the covering indexes used by the chart queries if they are missing
+        
+        The shared connection is read-only, so a short-lived writable one is
+        used. A read-only or locked database is not an error; the queries
+        then simply run without the indexes.
+        """
+        existing = {row[0] for row in self._conn.execute("SELECT name FROM sqlite_master WHERE type='index'")}
+        missing = [ddl for name, ddl in CHART_INDEXES.items() if name not in existing]
+        if not missing:
+            return
+            
+        conn = sqlite3.connect(self.db_path)
+        try:
+            with conn:
+                for ddl in missing:
+                    conn.execute(ddl)
+                conn.execute("ANALYZE")
+        except sqlite3.OperationalError as e:
+            print(f"Warning: Could not create visualization indexes: {str(e)}")
+            return
+        finally:
             conn.close()
-        except sqlite3.Error as e:
-            raise ValueError(f"Database error: {str(e)}")
+        
+        # Reopen so the query planner picks up the new indexes and statistics
+        self._conn.close()
+        self._conn = self._connect()
+
+    def _connect(self) -> sqlite3.Connection:
+        """
+        Open the read-only connection shared by all queries of this visualizer
+        
+        The connection may be used from several threads (e.g. by the web
+        interface), so access is serialized through _query.
+        """
+        db_uri = f"{Path(self.db_path).resolve().as_uri()}?mode=ro"
+        conn = sqlite3.connect(db_uri, uri=True, check_same_thread=False)
+        conn.execute("PRAGMA query_only = 1")
+        conn.execute("PRAGMA cache_size = -65536")  # 64 MiB page cache
+        conn.execute("PRAGMA mmap_size = 268435456")  # 256 MiB memory map
+        conn.execute("PRAGMA temp_store = MEMORY")
+        return conn
 
-    def _get_contribution_data(self, days=365) -> Tuple[List[datetime], List[int]]:
+    def _reset_figure(self, name: str, figsize: Tuple[float, float]):
         """
-        Get contribution data for the specified period
+        Get a cleared Figure for a new render of a chart type
         
         Args:
-            days: Number of days to include
+            name: Chart name, as in CHART_FORMATS
+            figsize: Figure size in inches, used when the Figure is created
             
         Returns:
-            Tuple of (dates, counts)
+            Tuple of (figure, axes)
         """
-        try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            # Calculate start date
-            end_date = datetime.now()
-            start_date = end_date - timedelta(days=days)
-            
-            # Query contributions by day
-            cursor.execute('''
-                SELECT DATE(timestamp), SUM(commit_count)
-                FROM contributions
-                WHERE timestamp >= ?
-                GROUP BY DATE(timestamp)
-                ORDER BY DATE(timestamp)
-            ''', (start_date.isoformat(),))
+        fig = self._figures.get(name)
+        if fig is None:
+            fig = self._figures[name] = Figure(figsize=figsize)
+        else:
+            # clear() keeps the margins from the last tight_layout(); restore the defaults
+            fig.clear()
+            fig.subplots_adjust(**{param: plt.rcParams[f'figure.subplot.{param}'] for param in SUBPLOT_PARAMS})
+        return fig, fig.add_subplot(111)
+
+    def _save_figure(self, fig: Figure, path, fmt: Optional[str] = None,
+                     output: str = 'path') -> Union[str, bytes]:
+        """
+        Save a finished chart
+        
+        The layout is tightened once on the figure instead of through
+        bbox_inches='tight', which needs an extra render pass on save.
+        
+        Args:
+            fig: Figure to save
+            path: Destination file
+            fmt: Image format, or None to use the file extension (PNG if it has none)
+            output: 'path', 'bytes' or 'base64', see _chart_output
             
-            results = cursor.fetchall()
+        Returns:
+            The chart in the requested output form
+        """
+        if output not in CHART_OUTPUTS:
+            raise ValueError(f"Unknown chart output: {output}")
+            
+        fig.tight_layout()
+        # Without a format or file extension, write PNG as savefig() would
+        fmt = fmt or Path(path).suffix.lstrip('.').lower() or 'png'
+        save_kwargs = {'format': fmt, 'dpi': self.dpi}
+        if fmt == 'png':
+            # Fastest deflate level; chart PNGs compress well regardless
+            save_kwargs['pil_kwargs'] = {'compress_level': 1}
+            
+        if output == 'path':
+            fig.savefig(path, **save_kwargs)
+            self._prune_cache(path)
+            return str(path)
+            
+        # Encode in memory and hand back the same bytes that are written out,
+        # so the caller does not have to read the file again. The file is
+        # still written: it is either the requested save_path or the image
+        # cache entry that later calls are served from.
+        buffer = io.BytesIO()
+        fig.savefig(buffer, **save_kwargs)
+        data = buffer.getvalue()
+        Path(path).write_bytes(data)
+        self._prune_cache(path)
+        return self._chart_output(path, output, data)
+
+    def _chart_output(self, path, output: str, data: Optional[bytes] = None) -> Union[str, bytes]:
+        """
+        Return a chart image in the form requested from a generator
+        
+        Args:
+            path: Image file
+            output: 'path' for the file path, 'bytes' for the encoded image,
+                    or 'base64' for the image as a base64 string
+            data: Contents of the file, if already in memory
+        """
+        if output == 'path':
+            return str(path)
+        if output == 'bytes':
+            return data if data is not None else Path(path).read_bytes()
+        if output == 'base64':
+            return self.get_image_base64(data if data is not None else path)
+        raise ValueError(f"Unknown chart output: {output}")
+
+    def _query(self, sql: str, params=()) -> List[tuple]:
+        """Run a query on the shared connection and return all rows"""
+        with self._conn_lock:
+            return self._connection().execute(sql, params).fetchall()
+
+    def _query_batches(self, sql: str, params=(), arraysize: int = FETCH_BATCH_SIZE) -> Iterator[List[tuple]]:
+        """Run a query on the shared connection and yield rows in batches of arraysize"""
+        with self._conn_lock:
+            cursor = self._connection().execute(sql, params)
+            cursor.arraysize = arraysize
+            while batch := cursor.fetchmany():
+                yield batch
+
+    def close(self):
+        """Close the shared database connection and drop the memoized series"""
+        series_cache = getattr(self, '_series_cache', None)
+        if series_cache is not None:
+            series_cache.clear()
+        conn = getattr(self, '_conn', None)
+        if conn is not None:
             conn.close()
+            self._conn = None
+
+    def __del__(self):
+        self.close()
+
+    def _file_version(self) -> tuple:
+        """
+        Identify the current state of the database files
+        
+        Unlike data_version this is the same for every connection and
+        process, so it can key the images cached on disk.
+        
+        Returns:
+            Today's date (the query windows end today), then the modification
+            time and size of the database and its WAL file
+        """
+        # Open the connection first, so index creation on first use does not
+        # change the file after it has been fingerprinted
+        with self._conn_lock:
+            self._connection()
+            
+        version = [datetime.now().date()]
+        for path in (self.db_path, f"{self.db_path}-wal"):
+            if os.path.exists(path):
+                stat = os.stat(path)
+                version.extend((stat.st_mtime_ns, stat.st_size))
+        return tuple(version)
+
+    def _data_version(self) -> tuple:
+        """
+        Identify the current state of the chart inputs for in-memory caches
+        
+        Returns:
+            SQLite's data_version counter for the shared connection, which
+            moves on every commit by another connection even within one mtime
+            tick, followed by _file_version()
+        """
+        with self._conn_lock:
+            data_version = self._connection().execute("PRAGMA data_version").fetchone()[0]
+        return (data_version, *self._file_version())
+
+    def _cache_path(self, name: str, fmt: str, *params) -> Path:
+        """
+        Get the cache file for a chart rendered from the current database
+        
+        The file name is the chart name, a key for the chart parameters and
+        a key for today's date and the size and modification time of the
+        database and its WAL file, so any change to the inputs produces a new
+        file name, shared by all processes rendering the same chart.
+        
+        Args:
+            name: Chart name used as the file prefix
+            fmt: Image format, used as the file extension
+            *params: Chart parameters that affect the output
             
-            if not results:
-                return [], []
-                
-            dates = [datetime.strptime(row[0], '%Y-%m-%d') for row in results]
-            counts = [int(row[1]) for row in results]
-            
-            return dates, counts
+        Returns:
+            Path of the cached image inside the cache directory
+        """
+        params_key = hashlib.blake2b('|'.join(map(str, [self.dpi, *params])).encode(), digest_size=4).hexdigest()
+        version_key = hashlib.blake2b('|'.join(map(str, self._file_version())).encode(), digest_size=8).hexdigest()
+        return self.cache_dir / f"{name}_{params_key}_{version_key}.{fmt}"
+
+    def _prune_cache(self, path):
+        """
+        Remove images of the same chart and parameters rendered from older data
+        
+        Args:
+            path: Image just written; anything but a _cache_path file is left alone
+        """
+        cache_path = Path(path)
+        key_parts = cache_path.stem.split('_')
+        if cache_path.parent != self.cache_dir or len(key_parts) != 3:
+            return
+        name, params_key, _ = key_parts
+        for cached_image in self.cache_dir.glob(f"{name}_{params_key}_*{cache_path.suffix}"):
+            if cached_image != cache_path:
+                cached_image.unlink(missing_ok=True)
+
+    def invalidate(self):
+        """Remove all cached chart images and query results"""
+        with self._series_lock:
+            self._series_cache.clear()
+        for cached_image in self.cache_dir.glob('*.*'):
+            cached_image.unlink(missing_ok=True)
+
+    def _get_contribution_data(self, days=365) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Get daily contribution counts for the specified period
+        
+        Every day in the period is included, with zero for days without
+        contributions. Results are memoized until the database changes or
+        the day rolls over.
+        
+        Args:
+            days: Number of days to include
             
+        Returns:
+            Tuple of read-only (dates, counts) arrays with datetime64[D] and
+            int64 dtypes, or empty arrays if there were no contributions
+        """
+        try:
+            key = (days, self._data_version())
+            with self._series_lock:
+                series = self._series_cache.get(key)
+                if series is not None:
+                    self._series_cache.move_to_end(key)
+                    return series
+                    
+            series = self._fetch_contribution_data(days)
+            with self._series_lock:
+                self._series_cache[key] = series
+                while len(self._series_cache) > SERIES_CACHE_SIZE:
+                    self._series_cache.popitem(last=False)
+            return series
         except sqlite3.Error as e:
             print(f"Database error: {str(e)}")
-            return [], []
+            return _empty_contribution_data()
+
+    def _fetch_contribution_data(self, days: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Query the daily contribution counts for _get_contribution_data
+        
+        Args:
+            days: Number of days to include
+        """
+        # Calculate start date
+        end_date = np.datetime64(datetime.now().date(), 'D')
+        start_date = end_date - days
+        
+        # Read the per-day rollup when the database has one, otherwise
+        # aggregate the raw rows through the DATE(timestamp) index
+        if self._has_daily_rollup:
+            sql = '''
+                SELECT day, commits
+                FROM contributions_daily
+                WHERE day BETWEEN :start AND :end AND commits != 0
+                ORDER BY day
+            '''
+        else:
+            sql = '''
+                SELECT DATE(timestamp) AS day, SUM(commit_count) AS total
+                FROM contributions
+                WHERE DATE(timestamp) BETWEEN :start AND :end
+                GROUP BY DATE(timestamp)
+                ORDER BY day
+            '''
+            
+        # Only days with contributions come back from the database, at most
+        # one row per day in the window, copied batch by batch into arrays
+        capacity = days + 1
+        active_dates = np.empty(capacity, dtype='datetime64[D]')
+        active_counts = np.empty(capacity, dtype=np.int64)
+        num_active = 0
+        for batch in self._query_batches(sql, {'start': str(start_date), 'end': str(end_date)}):
+            batch_end = num_active + len(batch)
+            active_dates[num_active:batch_end] = [row[0] for row in batch]
+            active_counts[num_active:batch_end] = [row[1] for row in batch]
+            num_active = batch_end
+            
+        active_dates = active_dates[:num_active]
+        active_counts = active_counts[:num_active]
+        if not active_counts.any():
+            return _empty_contribution_data()
+        
+        # Align the active days onto the full day range by binary search
+        dates = np.arange(start_date, end_date + 1)
+        idx = np.minimum(np.searchsorted(active_dates, dates), len(active_dates) - 1)
+        counts = np.where(active_dates[idx] == dates, active_counts[idx], 0)
+        
+        # The arrays are shared between calls through the cache
+        dates.flags.writeable = False
+        counts.flags.writeable = False
+        return dates, counts
 
-    def generate_heatmap(self, days=365, save_path=None) -> Optional[str]:
+    @_uses_chart_figure('heatmap')
+    def generate_heatmap(self, days=365, save_path=None, fmt=None, force=False,
+                         output='path') -> Optional[Union[str, bytes]]:
         """
         Generate a GitHub-style contribution heatmap
         
         Args:
             days: Number of days to include
             save_path: Path to save the image (optional)
+            fmt: Image format such as 'svg', 'webp' or 'png' (optional, defaults to
+                 the save_path extension or the chart's cache format)
+            force: Re-render even if the chart is already in the image cache
+            output: 'path' (default), 'bytes' or 'base64' for the form of the result
             
         Returns:
-            Path to the generated image or None if error
+            Path to the generated image, or its bytes or base64 string if
+            requested through output; None if error
         """
+        # Reuse a previously rendered image while the inputs are unchanged
+        cache_path = None if save_path else self._cache_path('heatmap', fmt or self.formats['heatmap'], days)
+        if cache_path and not force and cache_path.exists():
+            return self._chart_output(cache_path, output)
+        
         dates, counts = self._get_contribution_data(days)
         
-        if not dates:
+        if not dates.size:
             return None
             
-        # Fill in missing dates with zero commits
-        all_dates = []
-        all_counts = []
-        
-        current_date = min(dates)
-        end_date = max(dates)
+        # Daily data is already dense, one entry per day
+        all_dates, all_counts = dates, counts
         
-        while current_date <= end_date:
-            if current_date in dates:
-                idx = dates.index(current_date)
-                all_counts.append(counts[idx])
-            else:
-                all_counts.append(0)
-                
-            all_dates.append(current_date)
-            current_date += timedelta(days=1)
-            
-        # Calculate number of weeks and create matrix
-        num_weeks = len(all_dates) // 7 + (1 if len(all_dates) % 7 > 0 else 0)
-        activity_matrix = np.zeros((7, num_weeks))
+        # Pad the first week so each column is one Monday-to-Sunday week
+        start_weekday = int(all_dates[0].astype(np.int64) + 3) % 7  # 1970-01-01 was a Thursday
+        num_days = start_weekday + len(all_counts)
+        num_weeks = num_days // 7 + (1 if num_days % 7 > 0 else 0)
         
-        # Fill matrix with commit counts
-        for i, (date, count) in enumerate(zip(all_dates, all_counts)):
-            weekday = date.weekday()
-            week = i // 7
-            if week < num_weeks:
-                activity_matrix[weekday, week] = count
+        # Fill matrix with commit counts: rows are weekdays, columns are weeks
+        # in the smallest integer dtype that holds the day totals
+        matrix_dtype = np.result_type(np.min_scalar_type(all_counts.min()), np.min_scalar_type(all_counts.max()))
+        flat_counts = np.zeros(num_weeks * 7, dtype=matrix_dtype)
+        flat_counts[start_weekday:num_days] = all_counts
+        activity_matrix = flat_counts.reshape(num_weeks, 7).T
         
         # Create heatmap
-        fig, ax = plt.subplots(figsize=(12, 4))
+        fig, ax = self._reset_figure('heatmap', (12, 4))
+        
+        # Scale colors from zero to the busiest day
+        norm = Normalize(vmin=0, vmax=activity_matrix.max() or 1)
         
-        # Color mapping similar to GitHub's
-        cmap = plt.cm.Greens
+        # Plot heatmap as a single image, one pixel block per day
+        heatmap = ax.imshow(activity_matrix, cmap=self._cmap, norm=norm, aspect='auto', interpolation='nearest')
         
-        # Plot heatmap
-        heatmap = ax.pcolor(activity_matrix, cmap=cmap, edgecolors='white', linewidths=1)
+        # Separate the cells with a white grid on the cell borders
+        ax.set_xticks(np.arange(-0.5, num_weeks, 1), minor=True)
+        ax.set_yticks(np.arange(-0.5, 7, 1), minor=True)
+        ax.grid(False)
+        ax.grid(which='minor', color='white', linewidth=1)
+        ax.tick_params(which='minor', length=0)
         
         # Set y-axis labels (weekdays)
         weekdays = ['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun']
-        ax.set_yticks(np.arange(7) + 0.5)
+        ax.set_yticks(np.arange(7))
         ax.set_yticklabels(weekdays)
         
-        # Create month labels for x-axis
-        month_labels = []
-        month_positions = []
-        
-        current_month = None
-        for i, date in enumerate(all_dates):
-            if date.month != current_month:
-                current_month = date.month
-                month_labels.append(calendar.month_abbr[current_month])
-                month_positions.append(i // 7)
+        # Create month labels for x-axis at the week where each month starts
+        months = all_dates.astype('datetime64[M]').astype(np.int64)  # months since 1970-01
+        month_starts = np.concatenate(([0], np.flatnonzero(np.diff(months)) + 1))
+        month_labels = [calendar.month_abbr[month % 12 + 1] for month in months[month_starts].tolist()]
+        month_positions = (month_starts + start_weekday) // 7
         
         ax.set_xticks(month_positions)
         ax.set_xticklabels(month_labels)
@@ -181,79 +564,60 @@ class ContributionVisualizer:
         ax.set_title('Contribution Activity Heatmap')
         
         # Add colorbar
-        cbar = plt.colorbar(heatmap, ax=ax)
+        cbar = fig.colorbar(heatmap, ax=ax)
         cbar.set_label('Contributions')
         
-        # Save the figure if requested
-        if save_path:
-            plt.savefig(save_path, dpi=150, bbox_inches='tight')
-            plt.close(fig)
-            return save_path
-        else:
-            # Generate a temporary file
-            temp_file = self.cache_dir / f"heatmap_{datetime.now().strftime('%Y%m%d%H%M%S')}.png"
-            plt.savefig(temp_file, dpi=150, bbox_inches='tight')
-            plt.close(fig)
-            return str(temp_file)
+        # Save the figure to the requested path or into the image cache
+        return self._save_figure(fig, save_path or cache_path, fmt, output)
 
-    def generate_streak_chart(self, save_path=None) -> Optional[str]:
+    @_uses_chart_figure('streak')
+    def generate_streak_chart(self, save_path=None, fmt=None, force=False,
+                              output='path') -> Optional[Union[str, bytes]]:
         """
         Generate a streak analysis chart
         
         Args:
             save_path: Path to save the image (optional)
+            fmt: Image format such as 'svg', 'webp' or 'png' (optional, defaults to
+                 the save_path extension or the chart's cache format)
+            force: Re-render even if the chart is already in the image cache
+            output: 'path' (default), 'bytes' or 'base64' for the form of the result
             
         Returns:
-            Path to the generated image or None if error
+            Path to the generated image, or its bytes or base64 string if
+            requested through output; None if error
         """
+        # Reuse a previously rendered image while the inputs are unchanged
+        cache_path = None if save_path else self._cache_path('streak', fmt or self.formats['streak'], 365)
+        if cache_path and not force and cache_path.exists():
+            return self._chart_output(cache_path, output)
+        
         dates, counts = self._get_contribution_data(365)
         
-        if not dates:
+        if not dates.size:
             return None
             
-        # Fill in missing dates with zero commits
-        all_dates = []
-        all_counts = []
+        # Find runs of active days: +1 marks a run start, -1 the day after it ends
+        active = counts > 0
+        edges = np.diff(active.astype(np.int8), prepend=0, append=0)
+        run_starts = np.flatnonzero(edges == 1)
+        run_ends = np.flatnonzero(edges == -1)
+        streaks = run_ends - run_starts
         
-        start_date = datetime.now() - timedelta(days=365)
-        end_date = datetime.now()
-        
-        current_date = start_date
-        while current_date <= end_date:
-            date_str = current_date.strftime('%Y-%m-%d')
-            if current_date in dates:
-                idx = dates.index(current_date)
-                all_counts.append(counts[idx])
-            else:
-                all_counts.append(0)
-                
-            all_dates.append(current_date)
-            current_date += timedelta(days=1)
-        
-        # Calculate streaks
-        current_streak = 0
-        longest_streak = 0
-        streaks = []
-        
-        for count in reversed(all_counts):  # Start from most recent
-            if count > 0:
-                current_streak += 1
-            else:
-                if current_streak > 0:
-                    streaks.append(current_streak)
-                current_streak = 0
-            
-            longest_streak = max(longest_streak, current_streak)
-        
-        if current_streak > 0:
-            streaks.append(current_streak)
+        # Counts run oldest to newest, so the current streak is the run ending today
+        current_streak = int(streaks[-1]) if active[-1] else 0
+        longest_streak = int(streaks.max()) if streaks.size else 0
         
         # Create the streak chart
-        fig, ax = plt.subplots(figsize=(10, 6))
+        fig, ax = self._reset_figure('streak', (10, 6))
         
         # Plot streak distribution as a histogram
-        if streaks:
-            ax.hist(streaks, bins=range(1, max(streaks) + 2), alpha=0.7, color='skyblue', edgecolor='black')
+        if streaks.size:
+            # Streak lengths are small positive ints, so bincount is the exact
+            # histogram; one bar per length spanning [n, n + 1) like hist's bins
+            streak_frequency = np.bincount(streaks)
+            ax.bar(np.arange(1, len(streak_frequency)), streak_frequency[1:], width=1, align='edge',
+                   alpha=0.7, color='skyblue', edgecolor='black')
             
             # Add current streak line
             if current_streak > 0:
@@ -271,38 +635,41 @@ class ContributionVisualizer:
         ax.set_ylabel('Frequency')
         
         # Set x-axis to integers only
-        ax.set_xticks(range(0, max(streaks) + 2 if streaks else 2))
+        ax.set_xticks(range(0, longest_streak + 2))
         
-        # Save the figure if requested
-        if save_path:
-            plt.savefig(save_path, dpi=150, bbox_inches='tight')
-            plt.close(fig)
-            return save_path
-        else:
-            # Generate a temporary file
-            temp_file = self.cache_dir / f"streak_{datetime.now().strftime('%Y%m%d%H%M%S')}.png"
-            plt.savefig(temp_file, dpi=150, bbox_inches='tight')
-            plt.close(fig)
-            return str(temp_file)
+        # Save the figure to the requested path or into the image cache
+        return self._save_figure(fig, save_path or cache_path, fmt, output)
 
-    def generate_activity_timeline(self, days=90, save_path=None) -> Optional[str]:
+    @_uses_chart_figure('timeline')
+    def generate_activity_timeline(self, days=90, save_path=None, fmt=None, force=False,
+                                   output='path') -> Optional[Union[str, bytes]]:
         """
         Generate an activity timeline
         
         Args:
             days: Number of days to include
             save_path: Path to save the image (optional)
+            fmt: Image format such as 'svg', 'webp' or 'png' (optional, defaults to
+                 the save_path extension or the chart's cache format)
+            force: Re-render even if the chart is already in the image cache
+            output: 'path' (default), 'bytes' or 'base64' for the form of the result
             
         Returns:
-            Path to the generated image or None if error
+            Path to the generated image, or its bytes or base64 string if
+            requested through output; None if error
         """
+        # Reuse a previously rendered image while the inputs are unchanged
+        cache_path = None if save_path else self._cache_path('timeline', fmt or self.formats['timeline'], days)
+        if cache_path and not force and cache_path.exists():
+            return self._chart_output(cache_path, output)
+        
         dates, counts = self._get_contribution_data(days)
         
-        if not dates:
+        if not dates.size:
             return None
             
         # Create the activity timeline
-        fig, ax = plt.subplots(figsize=(12, 5))
+        fig, ax = self._reset_figure('timeline', (12, 5))
         
         # Plot activity as a line chart
         ax.plot(dates, counts, marker='o', linestyle='-', linewidth=2, markersize=5)
@@ -310,7 +677,9 @@ class ContributionVisualizer:
         # Add moving average
         window = min(7, len(counts))
         if window > 0:
-            moving_avg = np.convolve(counts, np.ones(window) / window, mode='valid')
+            # Window sums from prefix-sum differences, same values as convolve(mode='valid')
+            cumulative = np.concatenate(([0], np.cumsum(counts)))
+            moving_avg = (cumulative[window:] - cumulative[:-window]) / window
             moving_avg_dates = dates[window-1:]
             ax.plot(moving_avg_dates, moving_avg, linestyle='--', color='red', 
                     linewidth=2, label=f'{window}-day Moving Average')
@@ -328,42 +697,47 @@ class ContributionVisualizer:
         # Add legend
         ax.legend()
         
-        # Save the figure if requested
-        if save_path:
-            plt.savefig(save_path, dpi=150, bbox_inches='tight')
-            plt.close(fig)
-            return save_path
-        else:
-            # Generate a temporary file
-            temp_file = self.cache_dir / f"timeline_{datetime.now().strftime('%Y%m%d%H%M%S')}.png"
-            plt.savefig(temp_file, dpi=150, bbox_inches='tight')
-            plt.close(fig)
-            return str(temp_file)
+        # Save the figure to the requested path or into the image cache
+        return self._save_figure(fig, save_path or cache_path, fmt, output)
 
-    def generate_repo_distribution(self, save_path=None) -> Optional[str]:
+    @_uses_chart_figure('repos')
+    def generate_repo_distribution(self, save_path=None, fmt=None, force=False,
+                                   output='path') -> Optional[Union[str, bytes]]:
         """
         Generate a repository distribution chart
         
         Args:
             save_path: Path to save the image (optional)
+            fmt: Image format such as 'svg', 'webp' or 'png' (optional, defaults to
+                 the save_path extension or the chart's cache format)
+            force: Re-render even if the chart is already in the image cache
+            output: 'path' (default), 'bytes' or 'base64' for the form of the result
             
         Returns:
-            Path to the generated image or None if error
+            Path to the generated image, or its bytes or base64 string if
+            requested through output; None if error
         """
+        # Reuse a previously rendered image while the inputs are unchanged
+        cache_path = None if save_path else self._cache_path('repos', fmt or self.formats['repos'])
+        if cache_path and not force and cache_path.exists():
+            return self._chart_output(cache_path, output)
+        
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            # Query contributions by repository
-            cursor.execute('''
-                SELECT repo, SUM(commit_count)
-                FROM contributions
-                GROUP BY repo
-                ORDER BY SUM(commit_count) DESC
+            # Query the top 10 repositories, with the rest summed into 'Other'
+            results = self._query('''
+                WITH totals AS (
+                    SELECT repo, SUM(commit_count) AS total,
+                           ROW_NUMBER() OVER (ORDER BY SUM(commit_count) DESC) AS rank
+                    FROM contributions
+                    GROUP BY repo
+                )
+                SELECT repo, total, rank FROM totals WHERE rank <= 10
+                UNION ALL
+                SELECT 'Other', SUM(total), 11 FROM totals WHERE rank > 10
+                ORDER BY 3
             ''')
-            
-            results = cursor.fetchall()
-            conn.close()
+            # 'Other' sums to NULL when there are ten repositories or fewer
+            results = [row for row in results if row[1] is not None]
             
             if not results:
                 return None
@@ -371,14 +745,8 @@ class ContributionVisualizer:
             repos = [row[0] for row in results]
             counts = [int(row[1]) for row in results]
             
-            # Limit to top 10 repositories
-            if len(repos) > 10:
-                other_count = sum(counts[10:])
-                repos = repos[:10] + ['Other']
-                counts = counts[:10] + [other_count]
-                
             # Create the pie chart
-            fig, ax = plt.subplots(figsize=(10, 8))
+            fig, ax = self._reset_figure('repos', (10, 8))
             
             # Plot pie chart
             wedges, texts, autotexts = ax.pie(
@@ -395,55 +763,104 @@ class ContributionVisualizer:
             
             ax.set_title('Repository Distribution')
             
-            # Save the figure if requested
-            if save_path:
-                plt.savefig(save_path, dpi=150, bbox_inches='tight')
-                plt.close(fig)
-                return save_path
-            else:
-                # Generate a temporary file
-                temp_file = self.cache_dir / f"repos_{datetime.now().strftime('%Y%m%d%H%M%S')}.png"
-                plt.savefig(temp_file, dpi=150, bbox_inches='tight')
-                plt.close(fig)
-                return str(temp_file)
+            # Save the figure to the requested path or into the image cache
+            return self._save_figure(fig, save_path or cache_path, fmt, output)
                 
         except sqlite3.Error as e:
             print(f"Database error: {str(e)}")
             return None
 
+    def generate_all(self, save_dir=None, fmt=None, force=False) -> Dict[str, Optional[str]]:
+        """
+        Generate all charts concurrently
+        
+        Each chart type draws on its own Figure, so the renders run in
+        parallel threads; database reads are serialized on the shared
+        connection.
+        
+        Args:
+            save_dir: Directory to save the images in (optional, defaults to the image cache)
+            fmt: Image format for every chart (optional, defaults to each chart's format)
+            force: Re-render charts that are already in the image cache
+            
+        Returns:
+            Dictionary mapping chart name to image path, or None for charts that failed
+        """
+        generators = {
+            'heatmap': self.generate_heatmap,
+            'streak': self.generate_streak_chart,
+            'timeline': self.generate_activity_timeline,
+            'repos': self.generate_repo_distribution,
+        }
+        if save_dir:
+            os.makedirs(save_dir, exist_ok=True)
+            
+        def render(name):
+            save_path = Path(save_dir) / f"{name}.{fmt or self.formats[name]}" if save_dir else None
+            return generators[name](save_path=save_path, fmt=fmt, force=force)
+            
+        with ThreadPoolExecutor(max_workers=len(generators)) as executor:
+            return dict(zip(generators, executor.map(render, generators)))
+
     def get_image_base64(self, image_path) -> Optional[str]:
         """
         Convert an image to base64 for embedding in HTML
         
         Args:
-            image_path: Path to the image file
+            image_path: Path to the image file, or the image itself as bytes
             
         Returns:
             Base64 encoded image or None if error
         """
+        if isinstance(image_path, (bytes, bytearray)):
+            return binascii.b2a_base64(image_path, newline=False).decode('ascii')
+            
         try:
+            encoded = bytearray()
             with open(image_path, 'rb') as img_file:
-                return base64.b64encode(img_file.read()).decode('utf-8')
+                # Chunks are a multiple of 3 bytes so no padding is emitted mid-stream
+                while chunk := img_file.read(BASE64_CHUNK_SIZE):
+                    encoded += binascii.b2a_base64(chunk, newline=False)
+            return encoded.decode('ascii')
         except Exception as e:
             print(f"Error encoding image: {str(e)}")
             return None
 
+class ExampleConfigManager:
+    """Minimal stand-in for ConfigManager used by the example in main()"""
+    
+    def get(self, key, default=None):
+        if key == 'database.path':
+            return 'contributions.db' # Ensure this file exists or visualizer will fail
+        if key == 'visualization.style':
+            return 'seaborn-v0_8-darkgrid'
+        if key == 'visualization.cache_dir':
+            return '.cache/viz_output' # Example custom cache
+        return default
+
+
+# Charts rendered by the example in main(), by label and generator method
+EXAMPLE_CHARTS = {
+    'Heatmap': 'generate_heatmap',
+    'Streak chart': 'generate_streak_chart',
+    'Activity timeline': 'generate_activity_timeline',
+    'Repository distribution chart': 'generate_repo_distribution',
+}
+
+
+def _render_example_chart(method_name: str) -> Optional[str]:
+    """Render one example chart in a worker process, using its own visualizer and connection"""
+    visualizer = ContributionVisualizer(config_manager=ExampleConfigManager())
+    try:
+        return getattr(visualizer, method_name)()
+    finally:
+        visualizer.close()
+
+
 def main():
     """Example usage of the visualizer (for testing)"""
     print("Generating visualizations...")
 
-    # For testing, we can create a dummy ConfigManager or pass db_path directly
-    # Option 1: Dummy ConfigManager (preferred for new structure)
-    class MockConfigManager:
-        def get(self, key, default=None):
-            if key == 'database.path':
-                return 'contributions.db' # Ensure this file exists or visualizer will fail
-            if key == 'visualization.style':
-                return 'seaborn-v0_8-darkgrid'
-            if key == 'visualization.cache_dir':
-                return '.cache/viz_output' # Example custom cache
-            return default
-
     # Create a dummy contributions.db for testing if it doesn't exist
     if not os.path.exists('contributions.db'):
         print("Creating dummy contributions.db for testing...")
@@ -470,38 +887,31 @@ def main():
     else:
         print("Using existing contributions.db for testing.")
 
-    config_manager_instance = MockConfigManager()
-    visualizer = ContributionVisualizer(config_manager=config_manager_instance)
-
-    # Option 2: Direct db_path (legacy, for simpler testing if ConfigManager setup is complex)
-    # visualizer = ContributionVisualizer(db_path='contributions.db') 
-
     try:
-        heatmap_path = visualizer.generate_heatmap()
-        if heatmap_path:
-            print(f"Heatmap generated: {heatmap_path}")
-            base64_img = visualizer.get_image_base64(heatmap_path)
-            # print(f"Base64 Heatmap: {base64_img[:100]}...") # For brevity
-        else:
-            print("Failed to generate heatmap.")
+        # Validate the database, then open it here so its indexes are created
+        # once, before the workers would race to build them
+        visualizer = ContributionVisualizer(config_manager=ExampleConfigManager())
+        with visualizer._conn_lock:
+            visualizer._connection()
 
-        streak_path = visualizer.generate_streak_chart()
-        if streak_path:
-            print(f"Streak chart generated: {streak_path}")
-        else:
-            print("Failed to generate streak chart.")
+        # The charts are independent, so render them in parallel. SQLite
+        # connections cannot cross processes, so each worker opens its own.
+        with ProcessPoolExecutor(max_workers=len(EXAMPLE_CHARTS)) as executor:
+            futures = {
+                label: executor.submit(_render_example_chart, method_name)
+                for label, method_name in EXAMPLE_CHARTS.items()
+            }
+            chart_paths = {label: future.result() for label, future in futures.items()}
 
-        timeline_path = visualizer.generate_activity_timeline()
-        if timeline_path:
-            print(f"Activity timeline generated: {timeline_path}")
-        else:
-            print("Failed to generate activity timeline.")
+        for label, chart_path in chart_paths.items():
+            if chart_path:
+                print(f"{label} generated: {chart_path}")
+            else:
+                print(f"Failed to generate {label.lower()}.")
 
-        repo_dist_path = visualizer.generate_repo_distribution()
-        if repo_dist_path:
-            print(f"Repository distribution chart generated: {repo_dist_path}")
-        else:
-            print("Failed to generate repository distribution chart.")
+        if chart_paths['Heatmap']:
+            base64_img = visualizer.get_image_base64(chart_paths['Heatmap'])
+            # print(f"Base64 Heatmap: {base64_img[:100]}...") # For brevity
             
     except FileNotFoundError as e:
         print(f"Error: Database file not found. {e}")
@@ -512,4 +922,4 @@ def main():
         print(f"An unexpected error occurred: {e}")
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    main()
@@ -5,14 +5,34 @@ Provides a web dashboard for monitoring and configuring the contribution system.
 Uses Flask for the backend and Bootstrap for the frontend.
 """
 import os
+import atexit
+import gzip
 import json
+import hashlib
 import logging
+import sqlite3
 import threading
+import time
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime, timedelta
+from pathlib import Path
 from typing import Dict, List, Optional, Any
 from flask import Flask, render_template, request, jsonify, redirect, url_for
+from flask.json.provider import DefaultJSONProvider
+from jinja2 import FileSystemBytecodeCache
 from waitress import serve
 
+try:
+    import orjson
+except ImportError:  # Fall back to Flask's standard library encoder
+    orjson = None
+
+try:
+    from whitenoise import WhiteNoise
+except ImportError:  # Fall back to Flask's static file view
+    WhiteNoise = None
+
 # Import local modules
 from visualization import ContributionVisualizer
 from notification_system import NotificationManager, setup_notifications
@@ -21,10 +41,87 @@ from config_loader import ConfigManager
 # Configure logger
 logger = logging.getLogger(__name__)
 
+# Seconds a /api/stats payload is reused across dashboard polls
+STATS_CACHE_TTL = 2.0
+
+# WSGI servers start() can run the app on
+SERVERS = ('waitress', 'gevent')
+
+# Every /api/stats database figure in one statement, the lists as JSON text
+STATS_SQL = """
+    SELECT
+        (SELECT COUNT(*) FROM contributions),
+        (SELECT json_group_object(repo, n)
+         FROM (SELECT repo, COUNT(*) AS n FROM contributions GROUP BY repo)),
+        (SELECT json_group_array(json_object('timestamp', timestamp, 'repo', repo))
+         FROM (SELECT timestamp, repo FROM contributions ORDER BY timestamp DESC LIMIT 5))
+"""
+
+# Responses worth gzipping: text formats of at least COMPRESS_MIN_SIZE bytes.
+# Static CSS/JS is not compressed here; it is streamed as a file, or served
+# by WhiteNoise (which uses .gz files placed beside the originals) before
+# Flask runs.
+COMPRESS_MIMETYPES = frozenset({
+    'application/json', 'text/html', 'image/svg+xml',
+})
+COMPRESS_MIN_SIZE = 500
+
+# Seconds browsers may reuse static CSS/JS without revalidating
+STATIC_MAX_AGE = 3600
+
+# Seconds between re-renders of the visualizations, by the background worker
+# or, while it is not running, on request
+VIZ_REFRESH_INTERVAL = 300.0
+
+# Seconds a finished test notification waits to be polled before it is dropped
+NOTIFICATION_JOB_TTL = 600.0
+
+# MIME type of each chart image format, set explicitly rather than guessed,
+# as platform MIME tables may lack e.g. WebP
+IMAGE_MIMETYPES = {
+    '.png': 'image/png',
+    '.svg': 'image/svg+xml',
+    '.webp': 'image/webp',
+    '.jpg': 'image/jpeg',
+    '.jpeg': 'image/jpeg',
+    '.pdf': 'application/pdf',
+}
+
+# Visualizer method for each visualization type served by the API
+VIZ_GENERATORS = {
+    'heatmap': 'generate_heatmap',
+    'streak': 'generate_streak_chart',
+    'timeline': 'generate_activity_timeline',
+    'repo': 'generate_repo_distribution',
+}
+
+class WebJSONProvider(DefaultJSONProvider):
+    """
+    JSON provider for the API responses
+    
+    Encodes with orjson when it is installed, keeping Flask's conversions for
+    dates, decimals, UUIDs and dataclasses. Keys are not sorted.
+    """
+    sort_keys = False
+    
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        # orjson output is always compact, which is what responses outside
+        # debug mode ask for; other formatting needs the standard encoder
+        if orjson is None or set(kwargs) - {'separators'}:
+            return super().dumps(obj, **kwargs)
+        option = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS | orjson.OPT_NON_STR_KEYS
+        return orjson.dumps(obj, default=self.default, option=option).decode()
+    
+    def loads(self, s: Any, **kwargs: Any) -> Any:
+        if orjson is None or kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
 class WebInterface:
     """Web interface for the GitHub Contribution Hack"""
     
-    def __init__(self, config_manager: ConfigManager, host='127.0.0.1', port=5000):
+    def __init__(self, config_manager: ConfigManager, host='127.0.0.1', port=5000,
+                 server='waitress'):
         """
         Initialize the web interface
         
@@ -32,15 +129,37 @@ class WebInterface:
             config_manager: Instance of ConfigManager
             host: Host to bind the server to
             port: Port to bind the server to
+            server: WSGI server to run, one of SERVERS
         """
+        if server not in SERVERS:
+            raise ValueError(f"Unsupported server: {server}")
+            
         self.config_manager = config_manager
         self.host = host
         self.port = port
+        self.server = server
         
         # Create Flask app
         self.app = Flask(__name__, 
                           template_folder=os.path.join(os.path.dirname(__file__), 'templates'),
                           static_folder=os.path.join(os.path.dirname(__file__), 'static'))
+        self.app.json = WebJSONProvider(self.app)
+        self.app.config['SEND_FILE_MAX_AGE_DEFAULT'] = STATIC_MAX_AGE
+        if WhiteNoise is not None:
+            # Serve /static/ from an index built once, before Flask is entered
+            self.app.wsgi_app = WhiteNoise(self.app.wsgi_app, root=self.app.static_folder,
+                                           prefix='static/', max_age=STATIC_MAX_AGE)
+        
+        # Keep compiled templates across restarts; Flask only reloads
+        # changed templates in debug mode. Without a configured directory
+        # Jinja uses a per-user directory under the system temp dir.
+        jinja_cache_dir = config_manager.get('ui.web_interface.jinja_cache_dir')
+        try:
+            if jinja_cache_dir:
+                os.makedirs(jinja_cache_dir, exist_ok=True)
+            self.app.jinja_env.bytecode_cache = FileSystemBytecodeCache(jinja_cache_dir)
+        except (OSError, RuntimeError) as e:
+            logger.warning(f"Template bytecode cache disabled: {str(e)}")
         
         # Initialize visualization
         try:
@@ -56,12 +175,39 @@ class WebInterface:
             logger.error(f"Failed to initialize notification system: {str(e)}")
             self.notification_manager = None
         
+        # Recently built /api/stats payload as (monotonic time, JSON body),
+        # and the read-only connection its queries run on
+        self._stats_cache = (0.0, None)
+        self._stats_lock = threading.Lock()
+        self._stats_conn = None
+        
+        # Rendered visualizations as {viz_type: (monotonic time, image bytes, base64 image, MIME type, ETag)}
+        self._viz_cache: Dict[str, tuple] = {}
+        self._viz_locks = {viz_type: threading.Lock() for viz_type in VIZ_GENERATORS}
+        
+        # Keeps the visualizations rendered off the request path while the
+        # server runs; until then they are rendered on first request
+        self._viz_stop = threading.Event()
+        self._viz_thread = None
+        
+        # Test notifications in flight or not yet reported, as {job_id: Future},
+        # and when finished ones completed, as {job_id: monotonic time}
+        self._notification_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix='notify')
+        self._notification_jobs: Dict[str, Future] = {}
+        self._notification_finished: Dict[str, float] = {}
+        self._notification_lock = threading.Lock()
+        
+        # Config views as {'json': /api/config body, 'page': rendered /config},
+        # dropped whenever the configuration is changed through the dashboard
+        self._config_cache: Dict[str, Any] = {}
+        
         # Server thread
         self.server_thread = None
         self.running = False
         
         # Register routes
         self._register_routes()
+        self.app.after_request(self._compress_response)
         
     def _register_routes(self):
         """Register Flask routes"""
@@ -74,6 +220,7 @@ class WebInterface:
         self.app.route('/api/config', methods=['GET', 'POST'])(self.handle_config)
         self.app.route('/api/notifications', methods=['GET'])(self.get_notifications)
         self.app.route('/api/vizualization/<viz_type>', methods=['GET'])(self.get_visualization)
+        self.app.route('/api/vizualization/<viz_type>/image', methods=['GET'])(self.get_visualization_image)
         
         # Configuration pages
         self.app.route('/config')(self.config_page)
@@ -82,14 +229,43 @@ class WebInterface:
         
         # Actions
         self.app.route('/actions/test-notification', methods=['POST'])(self.test_notification)
+        self.app.route('/actions/test-notification/<job_id>', methods=['GET'])(self.test_notification_status)
         
     def dashboard(self):
         """Render the dashboard page"""
         return render_template('dashboard.html')
     
+    def _compress_response(self, response):
+        """Gzip text responses for clients that accept it"""
+        if (response.direct_passthrough
+                or response.status_code != 200
+                or 'Content-Encoding' in response.headers
+                or response.mimetype not in COMPRESS_MIMETYPES):
+            return response
+            
+        # Caches must key on Accept-Encoding whether or not this client gets gzip
+        response.vary.add('Accept-Encoding')
+        body = response.get_data()
+        if 'gzip' not in request.accept_encodings or len(body) < COMPRESS_MIN_SIZE:
+            return response
+            
+        # Not cached: bodies may hold credentials (the /config page) and are
+        # cheap to compress at this level
+        response.set_data(gzip.compress(body, compresslevel=6, mtime=0))
+        response.headers['Content-Encoding'] = 'gzip'
+        # The compressed body is a different representation of the same resource
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(etag, weak=True)
+        return response
+    
     def config_page(self):
         """Render the configuration page"""
-        return render_template('config.html', config=self.config_manager.get_all_config())
+        page = self._config_cache.get('page')
+        if page is None:
+            page = render_template('config.html', config=self.config_manager.get_all_config())
+            self._config_cache['page'] = page
+        return page
     
     def repositories_config(self):
         """Handle repository configuration"""
@@ -98,6 +274,7 @@ class WebInterface:
             repositories = request.form.getlist('repositories')
             self.config_manager.set('repositories', repositories)
             self.config_manager.save_config()
+            self._config_cache.clear()
             return redirect(url_for('config_page'))
         
         return render_template('repositories_config.html', 
@@ -134,6 +311,7 @@ class WebInterface:
             # Update config using ConfigManager
             self.config_manager.set('notifications', notification_config)
             self.config_manager.save_config()
+            self._config_cache.clear()
             
             # Reinitialize notification manager
             self.notification_manager = setup_notifications(self.config_manager)
@@ -145,6 +323,29 @@ class WebInterface:
     
     def get_stats(self):
         """API endpoint to get contribution statistics"""
+        # Build the payload at most once per TTL; concurrent polls wait for it
+        with self._stats_lock:
+            cached_at, body = self._stats_cache
+            if body is None or time.monotonic() - cached_at >= STATS_CACHE_TTL:
+                body = jsonify(self._collect_stats()).get_data()
+                self._stats_cache = (time.monotonic(), body)
+                
+        return self.app.response_class(body, mimetype='application/json')
+    
+    def _stats_connection(self) -> sqlite3.Connection:
+        """Return the connection for /api/stats, opening it on first use (hold _stats_lock)"""
+        if self._stats_conn is None:
+            db_path = self.config_manager.get('database.path', 'contributions.db')
+            conn = sqlite3.connect(f"{Path(db_path).resolve().as_uri()}?mode=ro", uri=True,
+                                   check_same_thread=False)
+            conn.execute("PRAGMA query_only = 1")
+            conn.execute("PRAGMA cache_size = -8192")  # 8 MiB page cache
+            conn.execute("PRAGMA mmap_size = 268435456")  # 256 MiB memory map
+            self._stats_conn = conn
+        return self._stats_conn
+    
+    def _collect_stats(self) -> Dict[str, Any]:
+        """Collect system and database statistics for /api/stats (hold _stats_lock)"""
         stats = {
             'timestamp': datetime.now().isoformat(),
             'uptime': '12 hours',  # TODO: Calculate actual uptime
@@ -153,28 +354,23 @@ class WebInterface:
         
         # Add database stats if available
         try:
-            import sqlite3
-            conn = sqlite3.connect('contributions.db')
-            cursor = conn.cursor()
+            conn = self._stats_connection()
             
-            # Get total contributions
-            cursor.execute('SELECT COUNT(*) FROM contributions')
-            stats['total_contributions'] = cursor.fetchone()[0]
-            
-            # Get counts by repository
-            cursor.execute('SELECT repo, COUNT(*) FROM contributions GROUP BY repo')
-            stats['repo_counts'] = {row[0]: row[1] for row in cursor.fetchall()}
-            
-            # Get recent contributions
-            cursor.execute('SELECT timestamp, repo FROM contributions ORDER BY timestamp DESC LIMIT 5')
-            stats['recent'] = [{'timestamp': row[0], 'repo': row[1]} for row in cursor.fetchall()]
-            
-            conn.close()
+            # Total contributions, counts by repository and recent contributions
+            total, repo_counts, recent = conn.execute(STATS_SQL).fetchone()
+            stats['total_contributions'] = total
+            stats['repo_counts'] = self.app.json.loads(repo_counts)
+            stats['recent'] = self.app.json.loads(recent)
         except Exception as e:
             logger.error(f"Failed to get database stats: {str(e)}")
             stats['db_error'] = str(e)
+            
+            # Reconnect on the next poll, e.g. once the database has been created
+            if self._stats_conn is not None:
+                self._stats_conn.close()
+                self._stats_conn = None
         
-        return jsonify(stats)
+        return stats
     
     def handle_config(self):
         """API endpoint to get or update configuration"""
@@ -185,6 +381,10 @@ class WebInterface:
                 # Merge with existing config using ConfigManager
                 self.config_manager.update_config(updated_config_data)
                 
+                # Cached config views and visualization settings may have changed
+                self._config_cache.clear()
+                self._viz_cache.clear()
+                
                 # Save to file
                 if self.config_manager.save_config():
                     return jsonify({'status': 'success'})
@@ -194,7 +394,11 @@ class WebInterface:
                 return jsonify({'status': 'error', 'message': 'Invalid configuration data'})
         else:
             # Return current config as JSON using ConfigManager
-            return jsonify(self.config_manager.get_all_config())
+            body = self._config_cache.get('json')
+            if body is None:
+                body = jsonify(self.config_manager.get_all_config()).get_data()
+                self._config_cache['json'] = body
+            return self.app.response_class(body, mimetype='application/json')
     
     def get_notifications(self):
         """API endpoint to get notification history"""
@@ -217,63 +421,219 @@ class WebInterface:
         if not self.visualizer:
             return jsonify({'status': 'error', 'message': 'Visualization system not available'})
             
+        if viz_type not in VIZ_GENERATORS:
+            return jsonify({'status': 'error', 'message': f'Invalid visualization type: {viz_type}'})
+            
         try:
-            image_path = None
-            
-            if viz_type == 'heatmap':
-                image_path = self.visualizer.generate_heatmap()
-            elif viz_type == 'streak':
-                image_path = self.visualizer.generate_streak_chart()
-            elif viz_type == 'timeline':
-                image_path = self.visualizer.generate_activity_timeline()
-            elif viz_type == 'repo':
-                image_path = self.visualizer.generate_repo_distribution()
-            else:
-                return jsonify({'status': 'error', 'message': f'Invalid visualization type: {viz_type}'})
-                
-            if not image_path or not os.path.exists(image_path):
-                return jsonify({'status': 'error', 'message': 'Failed to generate visualization'})
-                
-            # Convert image to base64
-            image_data = self.visualizer.get_image_base64(image_path)
-            if not image_data:
-                return jsonify({'status': 'error', 'message': 'Failed to encode image'})
-                
+            _, image_data, mime_type, _ = self._cached_visualization(viz_type)
             return jsonify({
                 'status': 'success',
                 'image': image_data,
-                'mime_type': 'image/png'
+                'mime_type': mime_type
             })
             
         except Exception as e:
             logger.error(f"Visualization error: {str(e)}")
             return jsonify({'status': 'error', 'message': str(e)})
     
+    def get_visualization_image(self, viz_type):
+        """
+        API endpoint to get a visualization as an image file
+        
+        Responses carry an ETag, so browsers revalidate with a 304 instead of
+        downloading an unchanged image again.
+        
+        Args:
+            viz_type: Type of visualization (heatmap, streak, timeline, repo)
+        """
+        if not self.visualizer:
+            return jsonify({'status': 'error', 'message': 'Visualization system not available'}), 503
+            
+        if viz_type not in VIZ_GENERATORS:
+            return jsonify({'status': 'error', 'message': f'Invalid visualization type: {viz_type}'}), 404
+            
+        try:
+            image_bytes, _, mime_type, etag = self._cached_visualization(viz_type)
+        except Exception as e:
+            logger.error(f"Visualization error: {str(e)}")
+            return jsonify({'status': 'error', 'message': str(e)}), 500
+            
+        response = self.app.response_class(image_bytes, mimetype=mime_type)
+        response.set_etag(etag)
+        response.cache_control.max_age = 60
+        return response.make_conditional(request)
+    
+    def _cached_visualization(self, viz_type: str) -> tuple:
+        """
+        Get the last rendered visualization, rendering it if there is none yet
+        
+        While the background worker runs it keeps the images fresh. Without
+        it (e.g. when the app is served by another WSGI server), an image
+        older than VIZ_REFRESH_INTERVAL is re-rendered on request, and the
+        previous one is served if that render fails.
+        
+        Args:
+            viz_type: Type of visualization, a key of VIZ_GENERATORS
+            
+        Returns:
+            Tuple of (image bytes, base64 image, MIME type, ETag)
+            
+        Raises:
+            RuntimeError: If the image could not be generated or encoded
+        """
+        cached = self._viz_cache.get(viz_type)
+        if cached is None or self._viz_is_stale(cached):
+            with self._viz_locks[viz_type]:
+                cached = self._viz_cache.get(viz_type)
+                if cached is None:
+                    cached = self._render_visualization(viz_type)
+                elif self._viz_is_stale(cached):
+                    try:
+                        cached = self._render_visualization(viz_type)
+                    except Exception as e:
+                        # Keep serving the last good image, retrying after another interval
+                        logger.error(f"{viz_type} visualization refresh failed: {str(e)}")
+                        cached = (time.monotonic(), *cached[1:])
+                        self._viz_cache[viz_type] = cached
+                        
+        return cached[1:]
+    
+    def _viz_is_stale(self, cached: tuple) -> bool:
+        """Whether a cached render is due for a refresh that the worker will not do"""
+        worker_running = self._viz_thread is not None and self._viz_thread.is_alive()
+        return not worker_running and time.monotonic() - cached[0] >= VIZ_REFRESH_INTERVAL
+    
+    def _render_visualization(self, viz_type: str) -> tuple:
+        """
+        Render a visualization and store it in the visualization cache
+        
+        Args:
+            viz_type: Type of visualization, a key of VIZ_GENERATORS
+            
+        Returns:
+            Tuple of (render time, image bytes, base64 image, MIME type, ETag)
+            
+        Raises:
+            RuntimeError: If the image could not be generated or encoded
+        """
+        image_path = getattr(self.visualizer, VIZ_GENERATORS[viz_type])()
+        if not image_path or not os.path.exists(image_path):
+            raise RuntimeError('Failed to generate visualization')
+            
+        # Convert image to base64
+        image_bytes = Path(image_path).read_bytes()
+        image_data = self.visualizer.get_image_base64(image_bytes)
+        if not image_data:
+            raise RuntimeError('Failed to encode image')
+            
+        mime_type = IMAGE_MIMETYPES.get(Path(image_path).suffix.lower(), 'application/octet-stream')
+        etag = hashlib.blake2b(image_bytes, digest_size=16).hexdigest()
+        rendered = (time.monotonic(), image_bytes, image_data, mime_type, etag)
+        self._viz_cache[viz_type] = rendered
+        return rendered
+    
+    def _viz_worker(self):
+        """Re-render every visualization each VIZ_REFRESH_INTERVAL until stopped"""
+        while True:
+            for viz_type in VIZ_GENERATORS:
+                if self._viz_stop.is_set():
+                    return
+                try:
+                    self._render_visualization(viz_type)
+                except Exception as e:
+                    # Keep serving the last good image
+                    logger.error(f"Background {viz_type} visualization failed: {str(e)}")
+                    
+            if self._viz_stop.wait(VIZ_REFRESH_INTERVAL):
+                return
+    
+    def _start_viz_worker(self):
+        """Start the background visualization worker if there is a visualizer"""
+        if not self.visualizer or self._viz_thread is not None:
+            return
+        self._viz_stop.clear()
+        self._viz_thread = threading.Thread(target=self._viz_worker, daemon=True)
+        self._viz_thread.start()
+        # Let a render in progress finish rather than kill it at exit
+        atexit.register(self._stop_viz_worker)
+    
+    def _stop_viz_worker(self):
+        """Stop the background visualization worker and wait for it to exit"""
+        self._viz_stop.set()
+        if self._viz_thread is not None:
+            self._viz_thread.join(timeout=30)
+            self._viz_thread = None
+        atexit.unregister(self._stop_viz_worker)
+    
     def test_notification(self):
-        """API endpoint to test notifications"""
+        """API endpoint to queue a test notification"""
         if not self.notification_manager:
             return jsonify({'status': 'error', 'message': 'Notification system not available'})
             
         channel = request.form.get('channel', '')
         level = request.form.get('level', 'info')
+        channels = [channel] if channel else None
         
-        try:
-            channels = [channel] if channel else None
-            results = self.notification_manager.notify(
-                "Test Notification",
-                f"This is a test notification from GitHub Contribution Hack sent at {datetime.now()}.",
-                level,
-                channels=channels
-            )
+        # SMTP and webhook calls can take seconds; send off the request thread
+        future = self._notification_executor.submit(
+            self.notification_manager.notify,
+            "Test Notification",
+            f"This is a test notification from GitHub Contribution Hack sent at {datetime.now()}.",
+            level,
+            channels=channels
+        )
+        job_id = uuid.uuid4().hex
+        with self._notification_lock:
+            self._prune_notification_jobs()
+            self._notification_jobs[job_id] = future
+        future.add_done_callback(lambda _: self._notification_job_done(job_id))
+        
+        return jsonify({'status': 'queued', 'job_id': job_id}), 202
+    
+    def test_notification_status(self, job_id):
+        """
+        API endpoint to get the outcome of a queued test notification
+        
+        Args:
+            job_id: Job ID returned when the test notification was queued
+        """
+        with self._notification_lock:
+            self._prune_notification_jobs()
+            future = self._notification_jobs.get(job_id)
+        if future is None:
+            return jsonify({'status': 'error', 'message': 'Unknown notification job'}), 404
             
-            return jsonify({
-                'status': 'success',
-                'results': results
-            })
+        if not future.done():
+            return jsonify({'status': 'pending'})
             
+        # Finished jobs are reported once
+        with self._notification_lock:
+            self._notification_jobs.pop(job_id, None)
+            self._notification_finished.pop(job_id, None)
+        try:
+            results = future.result()
         except Exception as e:
             logger.error(f"Notification test error: {str(e)}")
             return jsonify({'status': 'error', 'message': str(e)})
+            
+        return jsonify({
+            'status': 'success',
+            'results': results
+        })
+    
+    def _notification_job_done(self, job_id: str):
+        """Record when a test notification finished, so it can expire unpolled"""
+        with self._notification_lock:
+            if job_id in self._notification_jobs:
+                self._notification_finished[job_id] = time.monotonic()
+    
+    def _prune_notification_jobs(self):
+        """Drop test notifications finished over NOTIFICATION_JOB_TTL ago (hold _notification_lock)"""
+        expired_before = time.monotonic() - NOTIFICATION_JOB_TTL
+        for job_id, finished_at in list(self._notification_finished.items()):
+            if finished_at < expired_before:
+                del self._notification_finished[job_id]
+                self._notification_jobs.pop(job_id, None)
     
     def start(self, debug=False):
         """
@@ -290,10 +650,13 @@ class WebInterface:
             """Run the server in a separate thread"""
             if debug:
                 self.app.run(host=self.host, port=self.port, debug=True)
+            elif self.server == 'gevent' and self._serve_gevent():
+                pass
             else:
                 # Use waitress for production
                 serve(self.app, host=self.host, port=self.port)
                 
+        self._start_viz_worker()
         if debug:
             # Run directly in the current thread for debug mode
             self.running = True
@@ -307,6 +670,31 @@ class WebInterface:
             
         logger.info(f"Web interface started at http://{self.host}:{self.port}/")
         
+    def _serve_gevent(self) -> bool:
+        """
+        Serve the app with gevent's pywsgi server
+        
+        Connections are handled by greenlets, so idle and slow clients do not
+        hold a worker thread. The process is not monkey-patched because the
+        server runs beside the automation's own threads, so each request is
+        handed to the hub's threadpool where SQLite and matplotlib may block.
+        
+        Returns:
+            False if gevent is not installed, otherwise blocks until shutdown
+        """
+        try:
+            from gevent import get_hub
+            from gevent.pywsgi import WSGIServer
+        except ImportError:
+            logger.warning("gevent not installed, falling back to waitress")
+            return False
+            
+        def app(environ, start_response):
+            return get_hub().threadpool.apply(self.app, (environ, start_response))
+            
+        WSGIServer((self.host, self.port), app, log=None).serve_forever()
+        return True
+        
     def stop(self):
         """Stop the web interface server"""
         if not self.running:
@@ -314,9 +702,11 @@ class WebInterface:
             return
             
         self.running = False
+        self._stop_viz_worker()
         logger.info("Web interface stopped")
 
-def setup_web_interface(config_manager: ConfigManager, host='127.0.0.1', port=5000):
+def setup_web_interface(config_manager: ConfigManager, host='127.0.0.1', port=5000,
+                        server='waitress'):
     """
     Set up and return the web interface instance.
 
@@ -324,440 +714,25 @@ def setup_web_interface(config_manager: ConfigManager, host='127.0.0.1', port=50
         config_manager: The ConfigManager instance.
         host: The host for the web server.
         port: The port for the web server.
+        server: The WSGI server to run, 'waitress' or 'gevent'.
 
     Returns:
         WebInterface: The initialized web interface instance.
     """
     # Pass the ConfigManager instance to WebInterface
-    interface = WebInterface(config_manager=config_manager, host=host, port=port)
+    interface = WebInterface(config_manager=config_manager, host=host, port=port,
+                             server=server)
     return interface
 
-# Create app directory structure
-def setup_web_interface():
-    """Set up directory structure for the web interface"""
-    base_dir = os.path.dirname(os.path.abspath(__file__))
-    
-    # Create templates directory
-    templates_dir = os.path.join(base_dir, 'templates')
-    os.makedirs(templates_dir, exist_ok=True)
-    
-    # Create static directory and subdirectories
-    static_dir = os.path.join(base_dir, 'static')
-    os.makedirs(os.path.join(static_dir, 'css'), exist_ok=True)
-    os.makedirs(os.path.join(static_dir, 'js'), exist_ok=True)
-    os.makedirs(os.path.join(static_dir, 'img'), exist_ok=True)
-    
-    # Create basic HTML templates
-    with open(os.path.join(templates_dir, 'base.html'), 'w') as f:
-        f.write('''<!DOCTYPE html>
-<html lang="en">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>{% block title %}GitHub Contribution Hack{% endblock %}</title>
-    <link href="https://cdn.jsdelivr.net/npm/bootstrap@5.3.0-alpha1/dist/css/bootstrap.min.css" rel="stylesheet">
-    <link rel="stylesheet" href="{{ url_for('static', filename='css/styles.css') }}">
-    {% block extra_css %}{% endblock %}
-</head>
-<body>
-    <nav class="navbar navbar-expand-lg navbar-dark bg-primary">
-        <div class="container-fluid">
-            <a class="navbar-brand" href="/">GitHub Contribution Hack</a>
-            <button class="navbar-toggler" type="button" data-bs-toggle="collapse" data-bs-target="#navbarNav">
-                <span class="navbar-toggler-icon"></span>
-            </button>
-            <div class="collapse navbar-collapse" id="navbarNav">
-                <ul class="navbar-nav">
-                    <li class="nav-item">
-                        <a class="nav-link" href="/">Dashboard</a>
-                    </li>
-                    <li class="nav-item">
-                        <a class="nav-link" href="/config">Configuration</a>
-                    </li>
-                </ul>
-            </div>
-        </div>
-    </nav>
-
-    <div class="container mt-4">
-        {% block content %}{% endblock %}
-    </div>
-
-    <footer class="footer mt-5">
-        <div class="container text-center py-3">
-            <span class="text-muted">GitHub Contribution Hack</span>
-        </div>
-    </footer>
-
-    <script src="https://cdn.jsdelivr.net/npm/bootstrap@5.3.0-alpha1/dist/js/bootstrap.bundle.min.js"></script>
-    <script src="https://cdn.jsdelivr.net/npm/chart.js"></script>
-    <script src="{{ url_for('static', filename='js/main.js') }}"></script>
-    {% block extra_js %}{% endblock %}
-</body>
-</html>''')
-    
-    with open(os.path.join(templates_dir, 'dashboard.html'), 'w') as f:
-        f.write('''{% extends "base.html" %}
-
-{% block title %}Dashboard - GitHub Contribution Hack{% endblock %}
-
-{% block content %}
-<div class="row">
-    <div class="col-md-12">
-        <h1>Dashboard</h1>
-        <div class="card mb-4">
-            <div class="card-header">
-                System Status
-            </div>
-            <div class="card-body">
-                <div class="row">
-                    <div class="col-md-4">
-                        <div class="card text-white bg-success mb-3">
-                            <div class="card-body">
-                                <h5 class="card-title">Status</h5>
-                                <p class="card-text" id="system-status">Loading...</p>
-                            </div>
-                        </div>
-                    </div>
-                    <div class="col-md-4">
-                        <div class="card mb-3">
-                            <div class="card-body">
-                                <h5 class="card-title">Uptime</h5>
-                                <p class="card-text" id="system-uptime">Loading...</p>
-                            </div>
-                        </div>
-                    </div>
-                    <div class="col-md-4">
-                        <div class="card mb-3">
-                            <div class="card-body">
-                                <h5 class="card-title">Total Contributions</h5>
-                                <p class="card-text" id="total-contributions">Loading...</p>
-                            </div>
-                        </div>
-                    </div>
-                </div>
-            </div>
-        </div>
-    </div>
-</div>
-
-<div class="row">
-    <div class="col-md-6">
-        <div class="card mb-4">
-            <div class="card-header">
-                Contribution Heatmap
-            </div>
-            <div class="card-body">
-                <img id="heatmap-img" src="" alt="Contribution Heatmap" class="img-fluid">
-            </div>
-        </div>
-    </div>
-    <div class="col-md-6">
-        <div class="card mb-4">
-            <div class="card-header">
-                Streak Analysis
-            </div>
-            <div class="card-body">
-                <img id="streak-img" src="" alt="Streak Analysis" class="img-fluid">
-            </div>
-        </div>
-    </div>
-</div>
-
-<div class="row">
-    <div class="col-md-6">
-        <div class="card mb-4">
-            <div class="card-header">
-                Activity Timeline
-            </div>
-            <div class="card-body">
-                <img id="timeline-img" src="" alt="Activity Timeline" class="img-fluid">
-            </div>
-        </div>
-    </div>
-    <div class="col-md-6">
-        <div class="card mb-4">
-            <div class="card-header">
-                Repository Distribution
-            </div>
-            <div class="card-body">
-                <img id="repo-img" src="" alt="Repository Distribution" class="img-fluid">
-            </div>
-        </div>
-    </div>
-</div>
-
-<div class="row">
-    <div class="col-md-12">
-        <div class="card mb-4">
-            <div class="card-header">
-                Recent Notifications
-            </div>
-            <div class="card-body">
-                <table class="table table-striped">
-                    <thead>
-                        <tr>
-                            <th>Time</th>
-                            <th>Title</th>
-                            <th>Level</th>
-                            <th>Message</th>
-                        </tr>
-                    </thead>
-                    <tbody id="recent-notifications">
-                        <tr>
-                            <td colspan="4" class="text-center">Loading...</td>
-                        </tr>
-                    </tbody>
-                </table>
-            </div>
-        </div>
-    </div>
-</div>
-{% endblock %}
-
-{% block extra_js %}
-<script>
-document.addEventListener('DOMContentLoaded', function() {
-    // Load system stats
-    fetch('/api/stats')
-        .then(response => response.json())
-        .then(data => {
-            document.getElementById('system-status').textContent = data.status || 'Unknown';
-            document.getElementById('system-uptime').textContent = data.uptime || 'Unknown';
-            document.getElementById('total-contributions').textContent = data.total_contributions || '0';
-        });
-    
-    // Load visualizations
-    ['heatmap', 'streak', 'timeline', 'repo'].forEach(vizType => {
-        fetch(`/api/vizualization/${vizType}`)
-            .then(response => response.json())
-            .then(data => {
-                if (data.status === 'success' && data.image) {
-                    document.getElementById(`${vizType}-img`).src = `data:${data.mime_type};base64,${data.image}`;
-                }
-            });
-    });
-    
-    // Load notifications
-    fetch('/api/notifications')
-        .then(response => response.json())
-        .then(data => {
-            const tableBody = document.getElementById('recent-notifications');
-            tableBody.innerHTML = '';
-            
-            if (data.status === 'success' && data.notifications && data.notifications.length > 0) {
-                data.notifications.forEach(notification => {
-                    const row = document.createElement('tr');
-                    
-                    // Format timestamp
-                    const timestamp = new Date(notification.timestamp);
-                    const formattedTime = timestamp.toLocaleString();
-                    
-                    // Set level class
-                    let levelClass = '';
-                    if (notification.level === 'error') {
-                        levelClass = 'text-danger';
-                    } else if (notification.level === 'warning') {
-                        levelClass = 'text-warning';
-                    } else if (notification.level === 'info') {
-                        levelClass = 'text-info';
-                    }
-                    
-                    row.innerHTML = `
-                        <td>${formattedTime}</td>
-                        <td>${notification.title}</td>
-                        <td class="${levelClass}">${notification.level.toUpperCase()}</td>
-                        <td>${notification.message}</td>
-                    `;
-                    
-                    tableBody.appendChild(row);
-                });
-            } else {
-                tableBody.innerHTML = '<tr><td colspan="4" class="text-center">No notifications available</td></tr>';
-            }
-        });
-});
-</script>
-{% endblock %}''')
-    
-    with open(os.path.join(templates_dir, 'config.html'), 'w') as f:
-        f.write('''{% extends "base.html" %}
-
-{% block title %}Configuration - GitHub Contribution Hack{% endblock %}
-
-{% block content %}
-<div class="row">
-    <div class="col-md-12">
-        <h1>Configuration</h1>
-        <div class="card mb-4">
-            <div class="card-header">
-                Configuration Options
-            </div>
-            <div class="card-body">
-                <div class="list-group">
-                    <a href="/config/repositories" class="list-group-item list-group-item-action">
-                        <div class="d-flex w-100 justify-content-between">
-                            <h5 class="mb-1">Repositories</h5>
-                        </div>
-                        <p class="mb-1">Configure repositories for contributions</p>
-                    </a>
-                    <a href="/config/notifications" class="list-group-item list-group-item-action">
-                        <div class="d-flex w-100 justify-content-between">
-                            <h5 class="mb-1">Notifications</h5>
-                        </div>
-                        <p class="mb-1">Configure notification channels and settings</p>
-                    </a>
-                </div>
-            </div>
-        </div>
-    </div>
-</div>
-
-<div class="row">
-    <div class="col-md-12">
-        <div class="card mb-4">
-            <div class="card-header">
-                Test Notifications
-            </div>
-            <div class="card-body">
-                <form id="test-notification-form">
-                    <div class="row mb-3">
-                        <div class="col-md-4">
-                            <label for="notification-channel" class="form-label">Channel</label>
-                            <select class="form-select" id="notification-channel" name="channel">
-                                <option value="">All Channels</option>
-                                <option value="email">Email</option>
-                                <option value="webhook">Webhook</option>
-                                <option value="desktop">Desktop</option>
-                            </select>
-                        </div>
-                        <div class="col-md-4">
-                            <label for="notification-level" class="form-label">Level</label>
-                            <select class="form-select" id="notification-level" name="level">
-                                <option value="info">Info</option>
-                                <option value="warning">Warning</option>
-                                <option value="error">Error</option>
-                            </select>
-                        </div>
-                        <div class="col-md-4">
-                            <label class="form-label">&nbsp;</label>
-                            <button type="submit" class="btn btn-primary d-block">Send Test Notification</button>
-                        </div>
-                    </div>
-                </form>
-                <div id="notification-result" class="alert d-none"></div>
-            </div>
-        </div>
-    </div>
-</div>
-
-<div class="row">
-    <div class="col-md-12">
-        <div class="card mb-4">
-            <div class="card-header">
-                Current Configuration
-            </div>
-            <div class="card-body">
-                <pre><code id="config-json">{{ config | tojson(indent=2) }}</code></pre>
-            </div>
-        </div>
-    </div>
-</div>
-{% endblock %}
-
-{% block extra_js %}
-<script>
-document.addEventListener('DOMContentLoaded', function() {
-    // Test notification
-    document.getElementById('test-notification-form').addEventListener('submit', function(e) {
-        e.preventDefault();
-        
-        const formData = new FormData(this);
-        const resultDiv = document.getElementById('notification-result');
-        
-        fetch('/actions/test-notification', {
-            method: 'POST',
-            body: formData
-        })
-        .then(response => response.json())
-        .then(data => {
-            resultDiv.classList.remove('d-none', 'alert-success', 'alert-danger');
-            
-            if (data.status === 'success') {
-                resultDiv.classList.add('alert-success');
-                resultDiv.textContent = 'Notification sent successfully!';
-            } else {
-                resultDiv.classList.add('alert-danger');
-                resultDiv.textContent = `Error: ${data.message}`;
-            }
-        })
-        .catch(error => {
-            resultDiv.classList.remove('d-none');
-            resultDiv.classList.add('alert-danger');
-            resultDiv.textContent = `Error: ${error.message}`;
-        });
-    });
-});
-</script>
-{% endblock %}''')
-    
-    # Create CSS file
-    with open(os.path.join(static_dir, 'css', 'styles.css'), 'w') as f:
-        f.write('''/* Custom styles for GitHub Contribution Hack */
-body {
-    background-color: #f8f9fa;
-}
-
-.navbar-brand {
-    font-weight: bold;
-}
-
-.card {
-    margin-bottom: 1.5rem;
-    border-radius: 0.25rem;
-    box-shadow: 0 0.125rem 0.25rem rgba(0, 0, 0, 0.075);
-}
-
-.footer {
-    background-color: #f8f9fa;
-    border-top: 1px solid #dee2e6;
-}''')
-    
-    # Create JS file
-    with open(os.path.join(static_dir, 'js', 'main.js'), 'w') as f:
-        f.write('''// Main JavaScript for GitHub Contribution Hack Web Interface
-
-// Auto refresh for dashboard elements
-function setupAutoRefresh() {
-    // Refresh stats every 60 seconds
-    setInterval(function() {
-        if (window.location.pathname === '/' || window.location.pathname === '/dashboard') {
-            fetch('/api/stats')
-                .then(response => response.json())
-                .then(data => {
-                    document.getElementById('system-status').textContent = data.status || 'Unknown';
-                    document.getElementById('system-uptime').textContent = data.uptime || 'Unknown';
-                    document.getElementById('total-contributions').textContent = data.total_contributions || '0';
-                });
-        }
-    }, 60000);
-}
-
-// Initialize on page load
-document.addEventListener('DOMContentLoaded', function() {
-    setupAutoRefresh();
-});''')
-    
-    # Return success
-    return True
-
 def main():
     """Main function for testing the web interface"""
-    # Set up the web interface
-    setup_web_interface()
-    
     # Start the web interface
-    interface = WebInterface()
+    config_manager = ConfigManager()
+    interface = setup_web_interface(
+        config_manager,
+        host=config_manager.get('ui.web_interface.host', '127.0.0.1'),
+        port=config_manager.get('ui.web_interface.port', 5000),
+        server=config_manager.get('ui.web_interface.server', 'waitress'))
     interface.start(debug=True)
 
 if __name__ == "__main__":